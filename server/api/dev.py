@@ -0,0 +1,42 @@
+from flask import Blueprint, current_app, request, jsonify
+
+from dev_dependencies.gen_test_data import run_test_story
+from api.validation import ValidationError, parse_test_story
+from api.serializers import validation_error_to_dict
+
+# Registered by create_app only when DEV_MODE is on; importing this module pulls in Faker.
+dev = Blueprint("dev", __name__, url_prefix="/dev")
+
+
+@dev.route("/gen_test_story", methods=["POST"])
+def generate_test_data():
+    try:
+        story = parse_test_story(request.get_json(silent=True))
+    except ValidationError as e:
+        return jsonify(validation_error_to_dict(e)), 400
+
+    try:
+        seed = run_test_story(story)
+        if seed is not None:
+            return jsonify({"detail": "Test data generated", "seed": seed}), 200
+        return jsonify({"detail": "Test data generated"}), 200
+    except Exception as e:
+        return jsonify({"detail": str(e)}), 400
+
+
+@dev.route("/pool_stats", methods=["GET"])
+def pool_stats():
+    return jsonify(current_app.extensions["postgres_pool"].stats())
+
+
+@dev.route("/replica_stats", methods=["GET"])
+def replica_stats():
+    return jsonify(current_app.extensions["replica_router"].stats())
+
+
+@dev.route("/availability_cache_stats", methods=["GET"])
+def availability_cache_stats():
+    availability_cache = current_app.extensions["availability_cache"]
+    if availability_cache is None:
+        return jsonify({"detail": "Availability cache is disabled"}), 404
+    return jsonify(availability_cache.stats())
@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+import zlib
+from dataclasses import fields
+from operator import attrgetter
+from typing import Iterable, Iterator, List, Tuple
+from domain.models import Order, OrderItem
+from api.serializers import order_to_dict, order_item_to_dict
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+CHUNK_SIZE = 64 * 1024
+
+CSV_HEADER = [f"order_{field.name}" for field in fields(Order)] + [f"item_{field.name}" for field in fields(OrderItem)]
+EMPTY_ITEM = (None,) * len(fields(OrderItem))
+order_values = attrgetter(*(field.name for field in fields(Order)))
+item_values = attrgetter(*(field.name for field in fields(OrderItem)))
+
+
+def _ndjson_lines(orders: Iterable[Tuple[Order, List[OrderItem]]]) -> Iterator[str]:
+    for order, items in orders:
+        record = order_to_dict(order)
+        record["items"] = [order_item_to_dict(item) for item in items]
+        yield json.dumps(record, default=str) + "\n"
+
+
+def _csv_lines(orders: Iterable[Tuple[Order, List[OrderItem]]]) -> Iterator[str]:
+    # One row per item; an order without items still gets a row with empty item columns.
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(CSV_HEADER)
+    for order, items in orders:
+        values = order_values(order)
+        for item in items or (None,):
+            writer.writerow(values + (item_values(item) if item else EMPTY_ITEM))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def export_orders(
+    orders: Iterable[Tuple[Order, List[OrderItem]]], export_format: str, compress: bool = False
+) -> Iterator[bytes]:
+    """Encode orders with their items as NDJSON or CSV in ~CHUNK_SIZE pieces, optionally gzipped."""
+    lines = _ndjson_lines(orders) if export_format == "ndjson" else _csv_lines(orders)
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    pending, size = [], 0
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            chunk = "".join(pending).encode("utf-8")
+            pending, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    chunk = "".join(pending).encode("utf-8")
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
@@ -0,0 +1,84 @@
+def product_to_dict(product) -> dict:
+    return {
+        "id": product.id,
+        "name": product.name,
+        "description": product.description,
+        "price": product.price,
+        "available": product.available,
+        "product_catalog_id": product.product_catalog_id,
+        "created_at": product.created_at.isoformat(),
+        "updated_at": product.updated_at.isoformat(),
+        "is_active": product.is_active
+    }
+
+
+def availability_to_dict(product) -> dict:
+    return {
+        "id": product.id,
+        "price": product.price,
+        "available": product.available,
+        "is_active": product.is_active
+    }
+
+
+def search_result_to_dict(result) -> dict:
+    return {**product_to_dict(result.product), "rank": result.rank}
+
+
+def search_cursor(result) -> str:
+    return f"{result.rank!r}:{result.product.id}"
+
+
+def product_import_to_dict(result) -> dict:
+    return {
+        "received": result.received,
+        "duplicates": result.duplicates,
+        "inserted": result.inserted,
+        "updated": result.updated,
+        "unchanged": result.unchanged,
+        "unknown": result.unknown
+    }
+
+
+def order_to_dict(order) -> dict:
+    return {
+        "id": order.id,
+        "customer_id": order.customer_id,
+        "order_date": order.order_date.isoformat() if order.order_date else None,
+        "status": order.status,
+        "delivery_address": order.delivery_address,
+        "notes": order.notes,
+        "created_at": order.created_at.isoformat() if order.created_at else None,
+        "updated_at": order.updated_at.isoformat() if order.updated_at else None,
+        "summary": {
+            "item_count": order.item_count,
+            "total_amount": order.total_amount,
+            "items_updated_at": order.items_updated_at.isoformat() if order.items_updated_at else None
+        }
+    }
+
+
+def order_cursor(order) -> str:
+    return f"{order.order_date.isoformat()}:{order.id}"
+
+
+def order_item_to_dict(order_item) -> dict:
+    return {
+        "id": order_item.id,
+        "order_id": order_item.order_id,
+        "product_id": order_item.product_id,
+        "product_name": order_item.product_name,
+        "unit_price": order_item.unit_price,
+        "quantity": order_item.quantity,
+        "created_at": order_item.created_at.isoformat(),
+        "is_active": order_item.is_active,
+        "reserved_quantity": order_item.reserved_quantity,
+        "reserved_until": order_item.reserved_until.isoformat() if order_item.reserved_until else None
+    }
+
+
+def validation_error_to_dict(error) -> dict:
+    body = {"detail": error.detail}
+    if error.errors:
+        body["errors"] = error.errors
+    return body
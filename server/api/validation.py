@@ -0,0 +1,207 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+
+class ValidationError(Exception):
+    def __init__(self, detail: str, errors: Optional[List[dict]] = None):
+        super().__init__(detail)
+        self.detail = detail
+        self.errors = errors
+
+
+def parse_order_item(data) -> Tuple[int, int]:
+    if not data:
+        raise ValidationError("Request body must be JSON")
+
+    product_id = data.get("product_id")
+    quantity = data.get("quantity")
+
+    if not isinstance(product_id, int) or not isinstance(quantity, int):
+        raise ValidationError("product_id and quantity must be integers")
+    if quantity <= 0:
+        raise ValidationError("quantity must be positive")
+    return product_id, quantity
+
+
+def parse_order_lines(data) -> List[Tuple[int, int]]:
+    if not data:
+        raise ValidationError("Request body must be JSON")
+
+    items = data.get("items")
+    if not isinstance(items, list) or not items:
+        raise ValidationError("items must be a non-empty list")
+
+    lines = []
+    errors = []
+    for index, item in enumerate(items):
+        product_id = item.get("product_id") if isinstance(item, dict) else None
+        quantity = item.get("quantity") if isinstance(item, dict) else None
+        if not isinstance(product_id, int) or not isinstance(quantity, int):
+            errors.append({"index": index, "product_id": product_id, "detail": "product_id and quantity must be integers"})
+        elif quantity <= 0:
+            errors.append({"index": index, "product_id": product_id, "detail": "quantity must be positive"})
+        else:
+            lines.append((product_id, quantity))
+    if errors:
+        raise ValidationError("Invalid order lines", errors)
+    return lines
+
+
+def parse_page(args, default_limit: int = 50, max_limit: int = 500) -> Tuple[Optional[int], int]:
+    after = args.get("after", type=int)
+    limit = args.get("limit", default_limit, type=int)
+    if limit <= 0 or limit > max_limit:
+        raise ValidationError(f"limit must be between 1 and {max_limit}")
+    return after, limit
+
+
+MAX_AVAILABILITY_IDS = 1000
+
+
+def _product_ids(values: list) -> List[int]:
+    if not values:
+        raise ValidationError("ids is required")
+    product_ids = []
+    for value in values:
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value)
+        if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+            raise ValidationError("ids must be positive integers")
+        product_ids.append(value)
+    product_ids = list(dict.fromkeys(product_ids))
+    if len(product_ids) > MAX_AVAILABILITY_IDS:
+        raise ValidationError(f"At most {MAX_AVAILABILITY_IDS} ids per request")
+    return product_ids
+
+
+def parse_availability_query(args) -> List[int]:
+    return _product_ids([value for ids in args.getlist("ids") for value in ids.split(",") if value])
+
+
+def parse_availability_body(data) -> List[int]:
+    if not isinstance(data, dict) or not isinstance(data.get("ids"), list):
+        raise ValidationError("Request body must be JSON with an ids list")
+    return _product_ids(data["ids"])
+
+
+def parse_search(
+    args, default_limit: int = 20, max_limit: int = 100
+) -> Tuple[str, Optional[int], Optional[Tuple[float, int]], int]:
+    query = (args.get("q") or "").strip()
+    if not query:
+        raise ValidationError("q is required")
+    if len(query) > 200:
+        raise ValidationError("q must be at most 200 characters")
+
+    catalog_id = args.get("catalog_id")
+    if catalog_id is not None:
+        if not catalog_id.isdigit():
+            raise ValidationError("catalog_id must be an integer")
+        catalog_id = int(catalog_id)
+
+    after = args.get("after")
+    if after is not None:
+        rank, _, product_id = after.rpartition(":")
+        try:
+            after = (float(rank), int(product_id))
+        except ValueError:
+            raise ValidationError("after must be a next_after value from a previous page")
+
+    _, limit = parse_page(args, default_limit, max_limit)
+    return query, catalog_id, after, limit
+
+
+FEED_MIMETYPES = {"text/csv": "csv", "application/x-ndjson": "ndjson", "application/jsonl": "ndjson"}
+
+
+def parse_feed_format(args, mimetype: str) -> str:
+    feed_format = args.get("format") or FEED_MIMETYPES.get(mimetype)
+    if feed_format not in ("csv", "ndjson"):
+        raise ValidationError("format must be csv or ndjson (or send Content-Type text/csv or application/x-ndjson)")
+    return feed_format
+
+
+ORDER_STATUSES = ("new", "processing", "completed", "canceled")
+
+
+def _parse_datetime(args, name: str) -> Optional[datetime]:
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValidationError(f"{name} must be an ISO 8601 date or datetime")
+
+
+def parse_export(args) -> Tuple[str, Optional[List[str]], Optional[datetime], Optional[datetime], bool]:
+    export_format = args.get("format", "ndjson")
+    if export_format not in ("ndjson", "csv"):
+        raise ValidationError("format must be ndjson or csv")
+
+    statuses = [status for value in args.getlist("status") for status in value.split(",") if status]
+    unknown = [status for status in statuses if status not in ORDER_STATUSES]
+    if unknown:
+        raise ValidationError(f"status must be one of {', '.join(ORDER_STATUSES)}")
+
+    date_from = _parse_datetime(args, "from")
+    date_to = _parse_datetime(args, "to")
+    if date_from and date_to and date_from >= date_to:
+        raise ValidationError("from must be earlier than to")
+
+    compress = args.get("gzip", "false").lower() in ("1", "true", "yes")
+    return export_format, statuses or None, date_from, date_to, compress
+
+
+def parse_customer_orders(args) -> Tuple[Optional[List[str]], Optional[Tuple[datetime, int]], int]:
+    statuses = [status for value in args.getlist("status") for status in value.split(",") if status]
+    if any(status not in ORDER_STATUSES for status in statuses):
+        raise ValidationError(f"status must be one of {', '.join(ORDER_STATUSES)}")
+
+    after = args.get("after")
+    if after is not None:
+        order_date, _, order_id = after.rpartition(":")
+        try:
+            after = (datetime.fromisoformat(order_date), int(order_id))
+        except ValueError:
+            raise ValidationError("after must be a next_after value from a previous page")
+
+    _, limit = parse_page(args, 20, 100)
+    return statuses or None, after, limit
+
+
+def parse_test_story(data) -> dict:
+    if not data:
+        raise ValidationError("Request body must be JSON")
+
+    story = {
+        "n_catalogs": data.get("n_catalogs"),
+        "n_products": data.get("n_products"),
+        "n_customers": data.get("n_customers"),
+        "n_orders": data.get("n_orders"),
+        "n_order_items": data.get("n_order_items"),
+    }
+    if not all(story.values()):
+        raise ValidationError("Request body must be JSON")
+
+    try:
+        for key, value in story.items():
+            story[key] = int(value)
+    except ValueError:
+        raise ValidationError("The values do not meet the requirements")
+
+    seed = data.get("seed")
+    workers = data.get("workers", 1)
+    chunk_size = data.get("chunk_size", 10000)
+    if not isinstance(chunk_size, int) or chunk_size <= 0:
+        raise ValidationError("chunk_size must be a positive integer")
+    if not isinstance(workers, int) or workers <= 0:
+        raise ValidationError("workers must be a positive integer")
+    if seed is not None and not isinstance(seed, int):
+        raise ValidationError("seed must be an integer")
+
+    story["seed"] = seed
+    story["workers"] = workers
+    story["chunk_size"] = chunk_size
+    story["bulk"] = bool(data.get("bulk", False)) or seed is not None or workers != 1
+    return story
@@ -1,99 +1,355 @@
-from flask import Flask, request, jsonify
-from datetime import datetime
+import gzip
+import itertools
+import time
+from typing import Optional
+from flask import Blueprint, Flask, Response, current_app, g, request, jsonify
+from datetime import datetime, timedelta
 
 from infrastructure.config import Config
-from infrastructure.repositories.postgresql_repositories import PostgresConnection
-from infrastructure.repositories.postgresql_repositories import (
-    PostgresConnection,
-    PostgresProductRepository,
-    PostgresOrderRepository,
-    PostgresOrderItemRepository
+from infrastructure import metrics
+from infrastructure.repositories.postgresql_repositories import PostgresConnectionPool, PoolTimeoutError
+from infrastructure.repositories.postgresql_unit_of_work import PostgresUnitOfWork, ReadOnlyPostgresUnitOfWork
+from infrastructure.repositories.replica_router import ReplicaRouter
+from infrastructure.repositories.product_import import PostgresProductImporter, ProductFeedError
+from infrastructure.repositories.cached_repositories import ProductCache
+from usecases.add_product_to_order import (
+    OrderService,
+    OrderNotFoundError,
+    CustomerNotFoundError,
+    ProductNotFoundError,
+    InsufficientStockError,
+    OrderLinesError
 )
-from usecases.add_product_to_order import OrderService, OrderNotFoundError, ProductNotFoundError, InsufficientStockError
-from dev_dependencies.gen_test_data import TestDataGenerator
-app = Flask(__name__)
+from usecases.browse_catalog import CatalogService, ContainerNotFoundError
+from usecases.export_orders import OrderExportService
+from api.validation import (
+    ValidationError,
+    parse_order_item,
+    parse_order_lines,
+    parse_page,
+    parse_search,
+    parse_availability_query,
+    parse_availability_body,
+    parse_feed_format,
+    parse_export,
+    parse_customer_orders
+)
+from api.exports import EXPORT_CONTENT_TYPES, export_orders
+from api.serializers import (
+    product_to_dict,
+    availability_to_dict,
+    product_import_to_dict,
+    search_result_to_dict,
+    search_cursor,
+    order_to_dict,
+    order_cursor,
+    order_item_to_dict,
+    validation_error_to_dict
+)
+api = Blueprint("api", __name__)
 
-connection = PostgresConnection()
 
-product_repo = PostgresProductRepository(connection)
-order_repo = PostgresOrderRepository(connection)
-order_item_repo = PostgresOrderItemRepository(connection)
+def create_app(config=Config) -> Flask:
+    """Build the application without touching the database: the pool connects on first checkout."""
+    app = Flask(__name__)
+    app.config.from_object(config)
 
-order_service = OrderService(
-    product_repo=product_repo,
-    order_repo=order_repo,
-    order_item_repo=order_item_repo
-)
+    pool = _connection_pool(config)
+    router = ReplicaRouter(
+        pool,
+        [_connection_pool(config, dsn) for dsn in config.POSTGRES_REPLICA_URLS],
+        config.REPLICA_ROUTING,
+        config.REPLICA_MAX_LAG,
+        config.REPLICA_LAG_CHECK_INTERVAL,
+        config.REPLICA_PROBE_TIMEOUT
+    )
+    metrics.register_pool(pool)
+    for replica in router.replicas:
+        metrics.register_pool(replica.pool, replica.name)
+    availability_cache = None
+    if config.AVAILABILITY_CACHE_SIZE > 0:
+        availability_cache = ProductCache(config.AVAILABILITY_CACHE_SIZE, config.AVAILABILITY_CACHE_TTL)
+    app.extensions["postgres_pool"] = pool
+    app.extensions["replica_router"] = router
+    app.extensions["availability_cache"] = availability_cache
 
+    app.before_request(start_timer)
+    app.after_request(record_request_duration)
+    app.register_blueprint(api)
+    if config.DEV_MODE:
+        # Imported here so production workers never load the test data generator and Faker.
+        from api.dev import dev
+        app.register_blueprint(dev)
+    return app
 
-@app.route("/orders/<int:order_id>/items", methods=["POST"])
-def add_product_to_order(order_id):
-    data = request.get_json()
-    if not data:
-        return jsonify({"detail": "Request body must be JSON"}), 400
 
-    product_id = data.get("product_id")
-    quantity = data.get("quantity")
+def _connection_pool(config, dsn: Optional[str] = None) -> PostgresConnectionPool:
+    return PostgresConnectionPool(
+        config.POSTGRES_POOL_MIN_SIZE,
+        config.POSTGRES_POOL_MAX_SIZE,
+        config.POSTGRES_POOL_TIMEOUT,
+        config.POSTGRES_POOL_HEALTH_CHECK_INTERVAL,
+        lazy=True,
+        dsn=dsn
+    )
+
+
+def get_pool() -> PostgresConnectionPool:
+    return current_app.extensions["postgres_pool"]
+
+
+def get_replica_router() -> ReplicaRouter:
+    return current_app.extensions["replica_router"]
+
+
+def get_availability_cache() -> Optional[ProductCache]:
+    return current_app.extensions["availability_cache"]
+
 
-    if not isinstance(product_id, int) or not isinstance(quantity, int):
-        return jsonify({"detail": "product_id and quantity must be integers"}), 400
-    if quantity <= 0:
-        return jsonify({"detail": "quantity must be positive"}), 400
+def get_order_service() -> OrderService:
+    return OrderService(
+        PostgresUnitOfWork(get_pool()),
+        timedelta(seconds=current_app.config["RESERVATION_TTL"])
+    )
 
+
+# Listings, search and exports tolerate REPLICA_MAX_LAG of staleness; orders and their items are read
+# from the primary so a client sees its own writes.
+def get_catalog_service() -> CatalogService:
+    return CatalogService(ReadOnlyPostgresUnitOfWork(get_replica_router(), get_availability_cache()))
+
+
+def get_order_export_service() -> OrderExportService:
+    return OrderExportService(ReadOnlyPostgresUnitOfWork(get_replica_router()))
+
+
+def start_timer():
+    g.started = time.perf_counter()
+
+
+def record_request_duration(response):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.HTTP_REQUEST_DURATION.labels(request.method, route, response.status_code).observe(
+        time.perf_counter() - g.started
+    )
+    return response
+
+
+@api.route("/orders/<int:order_id>", methods=["GET"])
+def get_order(order_id):
     try:
-        order_item = order_service.add_product_to_order(order_id, product_id, quantity)
+        order = get_order_service().get_order(order_id)
+        return jsonify(order_to_dict(order))
+    except OrderNotFoundError:
+        return jsonify({"detail": f"Order {order_id} not found"}), 404
+    except PoolTimeoutError as e:
+        return jsonify({"detail": str(e)}), 503
+    except Exception as e:
+        current_app.logger.exception("Unhandled error in %s", request.path)
+        return jsonify({"detail": f"Internal server error: {str(e)}"}), 500
+
+@api.route("/customers/<int:customer_id>/orders", methods=["GET"])
+def list_customer_orders(customer_id):
+    try:
+        statuses, after, limit = parse_customer_orders(request.args)
+    except ValidationError as e:
+        return jsonify(validation_error_to_dict(e)), 400
+
+    try:
+        orders = get_order_service().list_customer_orders(customer_id, after, limit, statuses)
         return jsonify({
-            "id": order_item.id,
-            "order_id": order_item.order_id,
-            "product_id": order_item.product_id,
-            "product_name": order_item.product_name,
-            "unit_price": order_item.unit_price,
-            "quantity": order_item.quantity,
-            "created_at": order_item.created_at.isoformat(),
-            "is_active": order_item.is_active
+            "items": [order_to_dict(order) for order in orders],
+            "next_after": order_cursor(orders[-1]) if len(orders) == limit else None
         })
+    except CustomerNotFoundError:
+        return jsonify({"detail": f"Customer {customer_id} not found"}), 404
+    except PoolTimeoutError as e:
+        return jsonify({"detail": str(e)}), 503
+    except Exception as e:
+        current_app.logger.exception("Unhandled error in %s", request.path)
+        return jsonify({"detail": f"Internal server error: {str(e)}"}), 500
+
+@api.route("/orders/<int:order_id>/items", methods=["POST"])
+def add_product_to_order(order_id):
+    try:
+        product_id, quantity = parse_order_item(request.get_json(silent=True))
+    except ValidationError as e:
+        return jsonify(validation_error_to_dict(e)), 400
+
+    try:
+        order_item = get_order_service().add_product_to_order(order_id, product_id, quantity)
+        return jsonify(order_item_to_dict(order_item))
     except OrderNotFoundError:
         return jsonify({"detail": f"Order {order_id} not found"}), 404
     except ProductNotFoundError:
         return jsonify({"detail": f"Product {product_id} not found"}), 404
     except InsufficientStockError as e:
         return jsonify({"detail": str(e)}), 400
+    except PoolTimeoutError as e:
+        return jsonify({"detail": str(e)}), 503
     except Exception as e:
+        current_app.logger.exception("Unhandled error in %s", request.path)
         return jsonify({"detail": f"Internal server error: {str(e)}"}), 500
 
-@app.route("/dev/gen_test_story", methods=["POST"])
-def generate_test_data():
-    data = request.get_json()
-    if not data:
-        return jsonify({"detail": "Request body must be JSON"}), 400
+@api.route("/orders/<int:order_id>/items:batch", methods=["POST"])
+def add_products_to_order(order_id):
+    try:
+        lines = parse_order_lines(request.get_json(silent=True))
+    except ValidationError as e:
+        return jsonify(validation_error_to_dict(e)), 400
 
-    nCatalogs = data.get("n_catalogs")
-    nProducts = data.get("n_products")
-    nCustomers = data.get("n_customers")
-    nOrders = data.get("n_orders")
-    nOrderItems = data.get("n_order_items")
+    try:
+        order_items = get_order_service().add_products_to_order(order_id, lines)
+        return jsonify({"order_id": order_id, "items": [order_item_to_dict(item) for item in order_items]})
+    except OrderNotFoundError:
+        return jsonify({"detail": f"Order {order_id} not found"}), 404
+    except OrderLinesError as e:
+        return jsonify({"detail": str(e), "errors": e.errors}), 400
+    except InsufficientStockError as e:
+        return jsonify({"detail": str(e)}), 409
+    except PoolTimeoutError as e:
+        return jsonify({"detail": str(e)}), 503
+    except Exception as e:
+        current_app.logger.exception("Unhandled error in %s", request.path)
+        return jsonify({"detail": f"Internal server error: {str(e)}"}), 500
+
+@api.route("/products", methods=["GET"])
+def list_products():
+    try:
+        after, limit = parse_page(request.args)
+    except ValidationError as e:
+        return jsonify(validation_error_to_dict(e)), 400
+
+    try:
+        products = get_catalog_service().list_products(after, limit)
+        return jsonify({
+            "items": [product_to_dict(product) for product in products],
+            "next_after": products[-1].id if len(products) == limit else None
+        })
+    except PoolTimeoutError as e:
+        return jsonify({"detail": str(e)}), 503
+    except Exception as e:
+        current_app.logger.exception("Unhandled error in %s", request.path)
+        return jsonify({"detail": f"Internal server error: {str(e)}"}), 500
 
-    if not nCatalogs or not nProducts or not nCustomers or not nOrders or not nOrderItems:
-        return jsonify({"detail": "Request body must be JSON"}), 400
+@api.route("/products/availability", methods=["GET", "POST"])
+def product_availability():
+    try:
+        if request.method == "POST":
+            product_ids = parse_availability_body(request.get_json(silent=True))
+        else:
+            product_ids = parse_availability_query(request.args)
+    except ValidationError as e:
+        return jsonify(validation_error_to_dict(e)), 400
 
     try:
-        int(nCatalogs)
-        int(nProducts)
-        int(nCustomers)
-        int(nOrders)
-        int(nOrderItems)
-    except ValueError:
-        return jsonify({"detail": "The values do not meet the requirements"}), 400
+        products = {product.id: product for product in get_catalog_service().get_availability(product_ids)}
+        # In the order requested; ids that do not exist are listed instead of failing the whole lookup.
+        return jsonify({
+            "items": [availability_to_dict(products[product_id]) for product_id in product_ids if product_id in products],
+            "missing": [product_id for product_id in product_ids if product_id not in products]
+        })
+    except PoolTimeoutError as e:
+        return jsonify({"detail": str(e)}), 503
+    except Exception as e:
+        current_app.logger.exception("Unhandled error in %s", request.path)
+        return jsonify({"detail": f"Internal server error: {str(e)}"}), 500
 
+@api.route("/products/search", methods=["GET"])
+def search_products():
     try:
-        testDataGenerator = TestDataGenerator()
+        query, catalog_id, after, limit = parse_search(request.args)
+    except ValidationError as e:
+        return jsonify(validation_error_to_dict(e)), 400
 
-        testDataGenerator.gen_test_data(nCatalogs, nProducts, nCustomers, nOrders, nOrderItems)
-        return jsonify({"detail": "Test data generated"}), 200
+    try:
+        results = get_catalog_service().search_products(query, catalog_id, after, limit)
+        return jsonify({
+            "items": [search_result_to_dict(result) for result in results],
+            "next_after": search_cursor(results[-1]) if len(results) == limit else None
+        })
+    except PoolTimeoutError as e:
+        return jsonify({"detail": str(e)}), 503
     except Exception as e:
+        current_app.logger.exception("Unhandled error in %s", request.path)
+        return jsonify({"detail": f"Internal server error: {str(e)}"}), 500
+
+@api.route("/products/import", methods=["POST"])
+def import_products():
+    try:
+        feed_format = parse_feed_format(request.args, request.mimetype)
+    except ValidationError as e:
+        return jsonify(validation_error_to_dict(e)), 400
+
+    stream = gzip.GzipFile(fileobj=request.stream) if request.content_encoding == "gzip" else request.stream
+    try:
+        with get_pool().connection() as connection:
+            result = PostgresProductImporter(connection).import_feed(stream, feed_format)
+            connection.commit()
+        return jsonify(product_import_to_dict(result))
+    except ProductFeedError as e:
         return jsonify({"detail": str(e)}), 400
+    except PoolTimeoutError as e:
+        return jsonify({"detail": str(e)}), 503
+    except Exception as e:
+        current_app.logger.exception("Unhandled error in %s", request.path)
+        return jsonify({"detail": f"Internal server error: {str(e)}"}), 500
+
+@api.route("/containers/<int:container_id>/products", methods=["GET"])
+def list_container_products(container_id):
+    try:
+        after, limit = parse_page(request.args)
+    except ValidationError as e:
+        return jsonify(validation_error_to_dict(e)), 400
+
+    try:
+        products = get_catalog_service().list_container_products(container_id, after, limit)
+        return jsonify({
+            "items": [product_to_dict(product) for product in products],
+            "next_after": products[-1].id if len(products) == limit else None
+        })
+    except ContainerNotFoundError:
+        return jsonify({"detail": f"Container {container_id} not found"}), 404
+    except PoolTimeoutError as e:
+        return jsonify({"detail": str(e)}), 503
+    except Exception as e:
+        current_app.logger.exception("Unhandled error in %s", request.path)
+        return jsonify({"detail": f"Internal server error: {str(e)}"}), 500
+
+@api.route("/exports/orders", methods=["GET"])
+def export_orders_stream():
+    try:
+        export_format, statuses, date_from, date_to, compress = parse_export(request.args)
+    except ValidationError as e:
+        return jsonify(validation_error_to_dict(e)), 400
+
+    orders = get_order_export_service().iter_orders(statuses, date_from, date_to)
+    try:
+        # Check out the connection and start the query before the response headers go out,
+        # so pool and query errors still get a proper status code.
+        first = next(orders, None)
+    except PoolTimeoutError as e:
+        return jsonify({"detail": str(e)}), 503
+    except Exception as e:
+        current_app.logger.exception("Unhandled error in %s", request.path)
+        return jsonify({"detail": f"Internal server error: {str(e)}"}), 500
+
+    filename = f"orders.{export_format}" + (".gz" if compress else "")
+    response = Response(
+        export_orders(itertools.chain([first] if first else [], orders), export_format, compress),
+        content_type="application/gzip" if compress else EXPORT_CONTENT_TYPES[export_format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+    # Returns the connection to the pool even when the client disconnects mid-stream.
+    response.call_on_close(orders.close)
+    return response
+
 
+@api.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
 
 
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=Config.FLASK_PORT)
+    create_app().run(debug=True, host="0.0.0.0", port=Config.FLASK_PORT)
@@ -0,0 +1,116 @@
+import asyncio
+from datetime import timedelta
+from quart import Quart, request, jsonify
+
+from infrastructure.config import Config
+from infrastructure.repositories.asyncpg_repositories import create_pool, AsyncpgUnitOfWork
+from usecases.add_product_to_order import (
+    AsyncOrderService,
+    OrderNotFoundError,
+    ProductNotFoundError,
+    InsufficientStockError,
+    OrderLinesError
+)
+from api.validation import ValidationError, parse_order_item, parse_order_lines, parse_page, parse_test_story
+from api.serializers import product_to_dict, order_item_to_dict, validation_error_to_dict
+app = Quart(__name__)
+
+pool = None
+
+
+@app.before_serving
+async def open_pool():
+    global pool
+    pool = await create_pool()
+
+
+@app.after_serving
+async def close_pool():
+    await pool.close()
+
+
+def get_order_service() -> AsyncOrderService:
+    return AsyncOrderService(AsyncpgUnitOfWork(pool), timedelta(seconds=Config.RESERVATION_TTL))
+
+
+@app.route("/orders/<int:order_id>/items", methods=["POST"])
+async def add_product_to_order(order_id):
+    try:
+        product_id, quantity = parse_order_item(await request.get_json(silent=True))
+    except ValidationError as e:
+        return jsonify(validation_error_to_dict(e)), 400
+
+    try:
+        order_item = await get_order_service().add_product_to_order(order_id, product_id, quantity)
+        return jsonify(order_item_to_dict(order_item))
+    except OrderNotFoundError:
+        return jsonify({"detail": f"Order {order_id} not found"}), 404
+    except ProductNotFoundError:
+        return jsonify({"detail": f"Product {product_id} not found"}), 404
+    except InsufficientStockError as e:
+        return jsonify({"detail": str(e)}), 400
+    except asyncio.TimeoutError:
+        return jsonify({"detail": "No database connection available"}), 503
+    except Exception as e:
+        return jsonify({"detail": f"Internal server error: {str(e)}"}), 500
+
+@app.route("/orders/<int:order_id>/items:batch", methods=["POST"])
+async def add_products_to_order(order_id):
+    try:
+        lines = parse_order_lines(await request.get_json(silent=True))
+    except ValidationError as e:
+        return jsonify(validation_error_to_dict(e)), 400
+
+    try:
+        order_items = await get_order_service().add_products_to_order(order_id, lines)
+        return jsonify({"order_id": order_id, "items": [order_item_to_dict(item) for item in order_items]})
+    except OrderNotFoundError:
+        return jsonify({"detail": f"Order {order_id} not found"}), 404
+    except OrderLinesError as e:
+        return jsonify({"detail": str(e), "errors": e.errors}), 400
+    except InsufficientStockError as e:
+        return jsonify({"detail": str(e)}), 409
+    except asyncio.TimeoutError:
+        return jsonify({"detail": "No database connection available"}), 503
+    except Exception as e:
+        return jsonify({"detail": f"Internal server error: {str(e)}"}), 500
+
+@app.route("/products", methods=["GET"])
+async def list_products():
+    try:
+        after, limit = parse_page(request.args)
+    except ValidationError as e:
+        return jsonify(validation_error_to_dict(e)), 400
+
+    try:
+        async with AsyncpgUnitOfWork(pool) as uow:
+            products = await uow.products.list_page(after, limit)
+        return jsonify({
+            "items": [product_to_dict(product) for product in products],
+            "next_after": products[-1].id if len(products) == limit else None
+        })
+    except asyncio.TimeoutError:
+        return jsonify({"detail": "No database connection available"}), 503
+    except Exception as e:
+        return jsonify({"detail": f"Internal server error: {str(e)}"}), 500
+
+async def generate_test_data():
+    # Deferred so that Faker is only loaded by dev deployments that actually generate data.
+    from dev_dependencies.gen_test_data import run_test_story
+
+    try:
+        story = parse_test_story(await request.get_json(silent=True))
+    except ValidationError as e:
+        return jsonify(validation_error_to_dict(e)), 400
+
+    try:
+        seed = await asyncio.to_thread(run_test_story, story)
+        if seed is not None:
+            return jsonify({"detail": "Test data generated", "seed": seed}), 200
+        return jsonify({"detail": "Test data generated"}), 200
+    except Exception as e:
+        return jsonify({"detail": str(e)}), 400
+
+
+if Config.DEV_MODE:
+    app.add_url_rule("/dev/gen_test_story", view_func=generate_test_data, methods=["POST"])
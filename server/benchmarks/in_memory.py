@@ -0,0 +1,288 @@
+import re
+from dataclasses import replace
+from datetime import datetime
+from itertools import count
+from typing import Dict, Iterator, List, Optional, Tuple
+from domain.models import CatalogContainer, ProductCatalog, Product, ProductSearchResult, Customer, Order, OrderItem
+from domain.repositories import (
+    CatalogRepository,
+    ProductRepository,
+    CustomerRepository,
+    OrderRepository,
+    OrderItemRepository
+)
+from domain.unit_of_work import UnitOfWork
+
+
+class InMemoryStore:
+    def __init__(self):
+        self.containers: Dict[int, CatalogContainer] = {}
+        self.catalogs: Dict[int, ProductCatalog] = {}
+        self.products: Dict[int, Product] = {}
+        self.customers: Dict[int, Customer] = {}
+        self.orders: Dict[int, Order] = {}
+        self.order_items: Dict[int, OrderItem] = {}
+        self.order_item_keys: Dict[tuple, int] = {}
+        self.ids = count(1)
+
+
+def _page(rows: Dict[int, object], after_id: Optional[int], limit: int) -> list:
+    return [replace(rows[key]) for key in sorted(rows) if key > (after_id or 0)][:limit]
+
+
+class InMemoryCatalogRepository(CatalogRepository):
+    def __init__(self, store: InMemoryStore):
+        self.store = store
+
+    def get_container_by_id(self, container_id: int) -> Optional[CatalogContainer]:
+        container = self.store.containers.get(container_id)
+        return replace(container) if container else None
+
+    def get_catalog_by_id(self, catalog_id: int) -> Optional[ProductCatalog]:
+        catalog = self.store.catalogs.get(catalog_id)
+        return replace(catalog) if catalog else None
+
+    def add_container(self, container: CatalogContainer) -> CatalogContainer:
+        container = replace(container, id=next(self.store.ids))
+        self.store.containers[container.id] = container
+        return replace(container)
+
+    def move_container(self, container_id: int, parent_id: Optional[int]) -> None:
+        self.store.containers[container_id].parent_id = parent_id
+
+    def list_descendant_containers(self, container_id: int) -> List[CatalogContainer]:
+        found = []
+        frontier = [container_id]
+        while frontier:
+            children = [c for c in self.store.containers.values() if c.parent_id in frontier]
+            found.extend(children)
+            frontier = [c.id for c in children]
+        return [replace(container) for container in found]
+
+    def list_subtree_products(self, container_id: int, after_id: Optional[int] = None, limit: int = 100) -> List[Product]:
+        # Only containers reachable through active ones: an inactive container hides its subtree.
+        containers = set()
+        root = self.store.containers.get(container_id)
+        frontier = [container_id] if root and root.is_active else []
+        while frontier:
+            containers.update(frontier)
+            frontier = [c.id for c in self.store.containers.values() if c.parent_id in frontier and c.is_active]
+        catalogs = {c.id for c in self.store.catalogs.values() if c.parent_container_id in containers and c.is_active}
+        products = {
+            key: product for key, product in self.store.products.items()
+            if product.is_active and product.product_catalog_id in catalogs
+        }
+        return _page(products, after_id, limit)
+
+
+class InMemoryProductRepository(ProductRepository):
+    def __init__(self, store: InMemoryStore):
+        self.store = store
+
+    def get_by_id(self, product_id: int) -> Optional[Product]:
+        product = self.store.products.get(product_id)
+        return replace(product) if product else None
+
+    def get_many(self, product_ids: List[int], for_update: bool = False) -> List[Product]:
+        return [replace(self.store.products[key]) for key in sorted(set(product_ids)) if key in self.store.products]
+
+    def update(self, product: Product) -> None:
+        self.store.products[product.id] = replace(product, updated_at=datetime.utcnow())
+
+    def reserve(self, product_id: int, quantity: int) -> Optional[Product]:
+        product = self.store.products.get(product_id)
+        if not product or product.available < quantity:
+            return None
+        product.reserved += quantity
+        product.updated_at = datetime.utcnow()
+        return replace(product)
+
+    def reserve_many(self, quantities: Dict[int, int]) -> List[Product]:
+        reserved = []
+        for product_id in sorted(quantities):
+            product = self.reserve(product_id, quantities[product_id])
+            if product:
+                reserved.append(product)
+        return reserved
+
+    def list_all(self) -> List[Product]:
+        return [replace(product) for product in self.store.products.values()]
+
+    def iter_all(self, itersize: Optional[int] = None) -> Iterator[Product]:
+        for key in sorted(self.store.products):
+            yield replace(self.store.products[key])
+
+    def list_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Product]:
+        return _page(self.store.products, after_id, limit)
+
+    def search(
+        self, query: str, catalog_id: Optional[int] = None, limit: int = 50, after: Optional[Tuple[float, int]] = None
+    ) -> List[ProductSearchResult]:
+        terms = re.findall(r"\w+", query.lower())
+        hits = []
+        for product in self.store.products.values():
+            if not terms or not product.is_active or catalog_id not in (None, product.product_catalog_id):
+                continue
+            words = re.findall(r"\w+", f"{product.name} {product.description or ''}".lower())
+            rank = float(sum(any(word.startswith(term) for word in words) for term in terms))
+            if rank == len(terms) and (after is None or (rank, product.id) < after):
+                hits.append(ProductSearchResult(replace(product), rank))
+        hits.sort(key=lambda hit: (hit.rank, hit.product.id), reverse=True)
+        return hits[:limit]
+
+
+class InMemoryCustomerRepository(CustomerRepository):
+    def __init__(self, store: InMemoryStore):
+        self.store = store
+
+    def get_by_id(self, customer_id: int) -> Optional[Customer]:
+        customer = self.store.customers.get(customer_id)
+        return replace(customer) if customer else None
+
+    def list_all(self) -> List[Customer]:
+        return [replace(customer) for customer in self.store.customers.values()]
+
+    def iter_all(self, itersize: Optional[int] = None) -> Iterator[Customer]:
+        for key in sorted(self.store.customers):
+            yield replace(self.store.customers[key])
+
+    def list_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Customer]:
+        return _page(self.store.customers, after_id, limit)
+
+    def add(self, customer: Customer) -> Customer:
+        customer = replace(customer, id=next(self.store.ids))
+        self.store.customers[customer.id] = customer
+        return replace(customer)
+
+    def update(self, customer: Customer) -> None:
+        self.store.customers[customer.id] = replace(customer, updated_at=datetime.utcnow())
+
+
+class InMemoryOrderRepository(OrderRepository):
+    def __init__(self, store: InMemoryStore):
+        self.store = store
+
+    def get_by_id(self, order_id: int, for_update: bool = False) -> Optional[Order]:
+        order = self.store.orders.get(order_id)
+        return replace(order) if order else None
+
+    def add(self, order: Order) -> Order:
+        order = replace(order, id=next(self.store.ids))
+        self.store.orders[order.id] = order
+        return replace(order)
+
+    def update(self, order: Order) -> None:
+        self.store.orders[order.id] = replace(order, updated_at=datetime.utcnow())
+
+    def list_all(self) -> List[Order]:
+        return [replace(order) for order in self.store.orders.values()]
+
+    def iter_all(self, itersize: Optional[int] = None) -> Iterator[Order]:
+        for key in sorted(self.store.orders):
+            yield replace(self.store.orders[key])
+
+    def iter_with_items(
+        self,
+        statuses: Optional[List[str]] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        itersize: Optional[int] = None
+    ) -> Iterator[Tuple[Order, List[OrderItem]]]:
+        items_by_order = {}
+        for item in self.store.order_items.values():
+            items_by_order.setdefault(item.order_id, []).append(item)
+        for key in sorted(self.store.orders):
+            order = self.store.orders[key]
+            if statuses and order.status not in statuses:
+                continue
+            if (date_from and order.order_date < date_from) or (date_to and order.order_date >= date_to):
+                continue
+            items = sorted(items_by_order.get(key, []), key=lambda item: item.product_id or 0)
+            yield replace(order), [replace(item) for item in items]
+
+    def list_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Order]:
+        return _page(self.store.orders, after_id, limit)
+
+    def list_by_customer(
+        self,
+        customer_id: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 50,
+        statuses: Optional[List[str]] = None
+    ) -> List[Order]:
+        orders = [
+            order for order in self.store.orders.values()
+            if order.customer_id == customer_id
+            and (not statuses or order.status in statuses)
+            and (not after or (order.order_date, order.id) < after)
+        ]
+        orders.sort(key=lambda order: (order.order_date, order.id), reverse=True)
+        return [replace(order) for order in orders[:limit]]
+
+
+class InMemoryOrderItemRepository(OrderItemRepository):
+    """Mirrors the order_items totals triggers by adjusting the order aggregates on every write."""
+
+    def __init__(self, store: InMemoryStore):
+        self.store = store
+
+    def _apply_totals(self, old: Optional[OrderItem], new: Optional[OrderItem]) -> None:
+        for item, sign in ((old, -1), (new, 1)):
+            order = self.store.orders.get(item.order_id) if item and item.is_active else None
+            if order:
+                order.item_count += sign
+                order.total_amount += sign * item.unit_price * item.quantity
+                order.items_updated_at = datetime.utcnow()
+
+    def list_by_order(self, order_id: int) -> List[OrderItem]:
+        return [replace(item) for item in self.store.order_items.values() if item.order_id == order_id]
+
+    def get_by_order_and_product(self, order_id: int, product_id: int) -> Optional[OrderItem]:
+        item_id = self.store.order_item_keys.get((order_id, product_id))
+        return replace(self.store.order_items[item_id]) if item_id else None
+
+    def add(self, order_item: OrderItem) -> OrderItem:
+        order_item = replace(order_item, id=next(self.store.ids))
+        self.store.order_items[order_item.id] = order_item
+        self.store.order_item_keys[(order_item.order_id, order_item.product_id)] = order_item.id
+        self._apply_totals(None, order_item)
+        return replace(order_item)
+
+    def upsert(self, order_item: OrderItem) -> OrderItem:
+        item_id = self.store.order_item_keys.get((order_item.order_id, order_item.product_id))
+        if not item_id:
+            return self.add(order_item)
+        existing = self.store.order_items[item_id]
+        updated = replace(
+            existing,
+            quantity=existing.quantity + order_item.quantity,
+            reserved_quantity=existing.reserved_quantity + order_item.reserved_quantity,
+            reserved_until=order_item.reserved_until
+        )
+        self.store.order_items[item_id] = updated
+        self._apply_totals(existing, updated)
+        return replace(updated)
+
+    def add_many(self, order_items: List[OrderItem]) -> List[OrderItem]:
+        return [self.upsert(order_item) for order_item in order_items]
+
+    def update(self, order_item: OrderItem) -> None:
+        self._apply_totals(self.store.order_items.get(order_item.id), order_item)
+        self.store.order_items[order_item.id] = replace(order_item)
+
+
+class InMemoryUnitOfWork(UnitOfWork):
+    def __init__(self, store: InMemoryStore):
+        self.store = store
+        self.catalogs = InMemoryCatalogRepository(store)
+        self.products = InMemoryProductRepository(store)
+        self.customers = InMemoryCustomerRepository(store)
+        self.orders = InMemoryOrderRepository(store)
+        self.order_items = InMemoryOrderItemRepository(store)
+        self.commits = 0
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def rollback(self) -> None:
+        pass
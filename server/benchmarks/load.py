@@ -0,0 +1,181 @@
+import argparse
+import http.client
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+ROOT_DIR = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(ROOT_DIR)
+
+from benchmarks.results import new_report, latency_metrics, finish
+
+
+def parse_range(value: str) -> list:
+    first, _, last = value.partition("-")
+    return list(range(int(first), int(last or first) + 1))
+
+
+class ProductPicker:
+    def __init__(self, product_ids: list, skew: str, zipf_s: float, seed: int):
+        self.product_ids = list(product_ids)
+        random.Random(seed).shuffle(self.product_ids)
+        self.cum_weights = None
+        if skew == "zipf":
+            weights = (1 / rank ** zipf_s for rank in range(1, len(self.product_ids) + 1))
+            self.cum_weights = list(itertools.accumulate(weights))
+
+    def pick(self, rng: random.Random, k: int = 1) -> list:
+        if self.cum_weights is None:
+            return rng.sample(self.product_ids, k)
+        picked = set()
+        while len(picked) < k:
+            picked.update(rng.choices(self.product_ids, cum_weights=self.cum_weights, k=k - len(picked)))
+        return list(picked)
+
+
+class LoadGenerator:
+    def __init__(self, args):
+        self.args = args
+        self.url = urlparse(args.url)
+        self.orders = parse_range(args.orders)
+        self.picker = ProductPicker(parse_range(args.products), args.skew, args.zipf_s, args.seed)
+        self.deadline = None
+        self.remaining = itertools.count()
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.statuses = Counter()
+        self.reserved_quantity = 0
+
+    def _request(self, rng: random.Random):
+        order_id = rng.choice(self.orders)
+        if self.args.batch_size > 1:
+            lines = [
+                {"product_id": product_id, "quantity": self.args.quantity}
+                for product_id in self.picker.pick(rng, self.args.batch_size)
+            ]
+            return f"/orders/{order_id}/items:batch", {"items": lines}, len(lines) * self.args.quantity
+        product_id = self.picker.pick(rng)[0]
+        return (
+            f"/orders/{order_id}/items",
+            {"product_id": product_id, "quantity": self.args.quantity},
+            self.args.quantity
+        )
+
+    def _worker(self, index: int):
+        rng = random.Random(self.args.seed + index)
+        connection = http.client.HTTPConnection(self.url.hostname, self.url.port or 80, timeout=self.args.timeout)
+        latencies = []
+        statuses = Counter()
+        reserved = 0
+        while time.monotonic() < self.deadline and next(self.remaining) < self.args.requests:
+            path, body, quantity = self._request(rng)
+            started = time.perf_counter()
+            try:
+                connection.request("POST", path, json.dumps(body), {"Content-Type": "application/json"})
+                response = connection.getresponse()
+                response.read()
+                statuses[response.status] += 1
+                if response.status == 200:
+                    reserved += quantity
+            except (OSError, http.client.HTTPException):
+                statuses["error"] += 1
+                connection.close()
+            latencies.append(time.perf_counter() - started)
+        connection.close()
+        with self.lock:
+            self.latencies.extend(latencies)
+            self.statuses.update(statuses)
+            self.reserved_quantity += reserved
+
+    def run(self) -> float:
+        self.deadline = time.monotonic() + self.args.duration
+        threads = [threading.Thread(target=self._worker, args=(index,)) for index in range(self.args.concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+
+def _stock_snapshot(product_ids: list) -> dict:
+    from infrastructure.repositories.postgresql_repositories import PostgresConnection
+    connection = PostgresConnection()
+    try:
+        cur = connection.conn.cursor()
+        cur.execute(
+            """
+            SELECT coalesce(sum(reserved), 0), count(*) FILTER (WHERE reserved > stock)
+            FROM product_inventory WHERE id = ANY(%s)
+            """,
+            (product_ids,)
+        )
+        reserved, oversold = cur.fetchone()
+        cur.close()
+        return {"reserved": int(reserved), "oversold": oversold}
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load generator for the add-to-order endpoints")
+    parser.add_argument("--url", default="http://127.0.0.1:5001")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--requests", type=int, default=sys.maxsize)
+    parser.add_argument("--orders", default="1-100", help="order id range, e.g. 1-100")
+    parser.add_argument("--products", default="1-1000", help="product id range, e.g. 1-1000")
+    parser.add_argument("--skew", choices=["uniform", "zipf"], default="uniform")
+    parser.add_argument("--zipf-s", type=float, default=1.1)
+    parser.add_argument("--quantity", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=1, help="> 1 uses the items:batch endpoint")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db-check", action="store_true", help="check reserved totals and oversell in Postgres")
+    parser.add_argument("--name", default=None)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+    product_ids = parse_range(args.products)
+    # A batch holds distinct products: the picker could never fill a larger one.
+    if args.batch_size > len(product_ids):
+        parser.error(f"--batch-size {args.batch_size} exceeds the {len(product_ids)} products in --products")
+
+    generator = LoadGenerator(args)
+    before = _stock_snapshot(product_ids) if args.db_check else None
+    elapsed = generator.run()
+
+    name = args.name or f"http.{args.skew}.c{args.concurrency}" + (f".batch{args.batch_size}" if args.batch_size > 1 else "")
+    metrics = latency_metrics(generator.latencies, elapsed)
+    total = sum(generator.statuses.values())
+    server_errors = sum(count for status, count in generator.statuses.items() if status == "error" or status >= 500)
+    metrics["error_rate"] = {"value": server_errors / total if total else 0.0, "unit": "", "better": "lower"}
+    for status, count in sorted(generator.statuses.items(), key=str):
+        metrics[f"status_{status}"] = {"value": count, "unit": "", "better": None}
+    if args.db_check:
+        after = _stock_snapshot(product_ids)
+        metrics["oversold_products"] = {"value": after["oversold"], "unit": "", "better": "lower"}
+        metrics["reservation_mismatch"] = {
+            "value": after["reserved"] - before["reserved"] - generator.reserved_quantity,
+            "unit": "",
+            "better": None
+        }
+
+    report = new_report("load", vars(args))
+    report["benchmarks"][name] = metrics
+    code = finish(report, args.output, args.baseline, args.tolerance)
+    if args.db_check and (metrics["oversold_products"]["value"] or metrics["reservation_mismatch"]["value"]):
+        print("Stock accounting is inconsistent: oversold products or reservations that do not match responses")
+        code = 1
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(ROOT_DIR)
+
+from domain.models import Product, Order
+from usecases.add_product_to_order import OrderService
+from benchmarks.in_memory import InMemoryStore, InMemoryUnitOfWork
+from benchmarks.results import new_report, latency_metrics, finish
+
+STOCK = 10 ** 9
+
+
+def _measure(operation, iterations: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        operation()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        op_started = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - op_started)
+    return latency_metrics(latencies, time.perf_counter() - started)
+
+
+def _in_memory_fixture(n_products: int):
+    store = InMemoryStore()
+    uow = InMemoryUnitOfWork(store)
+    now = datetime.utcnow()
+    order = uow.orders.add(Order(None, None, now, "new", None, None, now, now))
+    product_ids = []
+    for index in range(n_products):
+        product_id = next(store.ids)
+        store.products[product_id] = Product(
+            product_id, f"Product {index}", None, 10.0, STOCK, 0, None, now, now, True
+        )
+        product_ids.append(product_id)
+    return uow, order.id, product_ids
+
+
+class PostgresFixture:
+    def __init__(self, n_products: int):
+        from infrastructure.repositories.postgresql_repositories import PostgresConnectionPool
+        self.pool = PostgresConnectionPool(min_size=1, max_size=2)
+        self.n_products = n_products
+
+    def __enter__(self):
+        with self.pool.connection() as connection:
+            cur = connection.conn.cursor()
+            cur.execute("INSERT INTO orders (status, notes) VALUES ('new', 'benchmark') RETURNING id")
+            self.order_id = cur.fetchone()[0]
+            cur.execute(
+                """
+                INSERT INTO products (name, price, stock, is_active)
+                SELECT 'Benchmark ' || n, 10, %s, TRUE FROM generate_series(1, %s) AS n
+                RETURNING id
+                """,
+                (STOCK, self.n_products)
+            )
+            self.product_ids = sorted(row[0] for row in cur.fetchall())
+            connection.commit()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self.pool.connection() as connection:
+            cur = connection.conn.cursor()
+            cur.execute("DELETE FROM orders WHERE id = %s", (self.order_id,))
+            cur.execute("DELETE FROM products WHERE id = ANY(%s)", (self.product_ids,))
+            connection.commit()
+        self.pool.closeall()
+
+    def uow(self):
+        from infrastructure.repositories.postgresql_unit_of_work import PostgresUnitOfWork
+        return PostgresUnitOfWork(self.pool)
+
+
+def _service_benchmarks(report: dict, backend: str, make_uow, order_id: int, product_ids: list, args) -> None:
+    rng = random.Random(args.seed)
+
+    def add_one():
+        OrderService(make_uow()).add_product_to_order(order_id, rng.choice(product_ids), 1)
+
+    def add_batch():
+        lines = [(product_id, 1) for product_id in rng.sample(product_ids, min(args.batch_size, len(product_ids)))]
+        OrderService(make_uow()).add_products_to_order(order_id, lines)
+
+    report["benchmarks"][f"{backend}.add_product_to_order"] = _measure(add_one, args.iterations, args.warmup)
+    report["benchmarks"][f"{backend}.add_products_to_order[{args.batch_size}]"] = _measure(
+        add_batch, max(1, args.iterations // args.batch_size), args.warmup
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of OrderService")
+    parser.add_argument("--backend", choices=["memory", "postgres", "all"], default="all")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    report = new_report("micro", vars(args))
+    if args.backend in ("memory", "all"):
+        uow, order_id, product_ids = _in_memory_fixture(args.products)
+        _service_benchmarks(report, "memory", lambda: uow, order_id, product_ids, args)
+    if args.backend in ("postgres", "all"):
+        with PostgresFixture(args.products) as fixture:
+            _service_benchmarks(report, "postgres", fixture.uow, fixture.order_id, fixture.product_ids, args)
+    sys.exit(finish(report, args.output, args.baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def latency_metrics(latencies: List[float], elapsed: float) -> Dict[str, dict]:
+    return {
+        "throughput": {"value": len(latencies) / elapsed if elapsed else 0.0, "unit": "ops/s", "better": "higher"},
+        "p50": {"value": percentile(latencies, 50) * 1000, "unit": "ms", "better": "lower"},
+        "p95": {"value": percentile(latencies, 95) * 1000, "unit": "ms", "better": "lower"},
+        "p99": {"value": percentile(latencies, 99) * 1000, "unit": "ms", "better": "lower"},
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def new_report(suite: str, parameters: dict) -> dict:
+    return {
+        "suite": suite,
+        "created_at": datetime.utcnow().isoformat(),
+        "git_commit": _git_commit(),
+        "environment": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "parameters": parameters,
+        "benchmarks": {},
+    }
+
+
+def save_report(report: dict, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load_report(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.10) -> List[str]:
+    regressions = []
+    for name, metrics in current["benchmarks"].items():
+        for metric, result in metrics.items():
+            reference = baseline["benchmarks"].get(name, {}).get(metric)
+            if reference is None or not reference["value"] or result.get("better") not in ("lower", "higher"):
+                continue
+            change = (result["value"] - reference["value"]) / reference["value"]
+            if result["better"] == "higher":
+                change = -change
+            if change > tolerance:
+                regressions.append(
+                    f"{name}.{metric}: {reference['value']:.3f} -> {result['value']:.3f} {result['unit']} "
+                    f"({change:+.1%} worse)"
+                )
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    for name, metrics in report["benchmarks"].items():
+        values = ", ".join(f"{metric}={result['value']:.3f}{result['unit']}" for metric, result in metrics.items())
+        print(f"{name}: {values}")
+
+
+def finish(report: dict, output: str = None, baseline: str = None, tolerance: float = 0.10) -> int:
+    print_report(report)
+    if output:
+        save_report(report, output)
+    if baseline:
+        regressions = compare(report, load_report(baseline), tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a benchmark report with a stored baseline")
+    parser.add_argument("current")
+    parser.add_argument("baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+    sys.exit(finish(load_report(args.current), baseline=args.baseline, tolerance=args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
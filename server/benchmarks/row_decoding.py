@@ -0,0 +1,84 @@
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import fields, make_dataclass
+
+ROOT_DIR = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(ROOT_DIR)
+
+from psycopg2.extras import RealDictCursor
+from domain.models import Product
+from infrastructure.repositories.postgresql_repositories import PostgresConnection, PostgresProductRepository, PRODUCT_COLUMNS
+from benchmarks.results import new_report, finish
+
+# The pre-slots model, rebuilt from the current fields so both paths decode the same columns.
+DictProduct = make_dataclass("DictProduct", [(field.name, field.type) for field in fields(Product)])
+
+
+def list_all_dict_rows(connection: PostgresConnection) -> list:
+    cur = connection.conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(f"SELECT {PRODUCT_COLUMNS} FROM products")
+    rows = cur.fetchall()
+    cur.close()
+    return [DictProduct(**row) for row in rows]
+
+
+def list_all_tuple_rows(connection: PostgresConnection) -> list:
+    return PostgresProductRepository(connection).list_all()
+
+
+STRATEGIES = {
+    "dict_rows": list_all_dict_rows,
+    "tuple_rows": list_all_tuple_rows,
+}
+
+
+def _measure(strategy, connection: PostgresConnection, repeat: int) -> dict:
+    strategy(connection)
+    objects = 0
+    elapsed = 0.0
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        objects += len(strategy(connection))
+        elapsed += time.perf_counter() - started
+
+    gc.collect()
+    tracemalloc.start()
+    strategy(connection)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "objects_per_sec": {"value": objects / elapsed if elapsed else 0.0, "unit": "obj/s", "better": "higher"},
+        "peak_memory": {"value": peak / 2 ** 20, "unit": "MiB", "better": "lower"},
+        "rows": {"value": objects // repeat, "unit": "", "better": None},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode cost of products.list_all(): dict rows vs tuple rows")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--strategy", choices=[*STRATEGIES, "all"], default="all")
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    report = new_report("row_decoding", vars(args))
+    connection = PostgresConnection()
+    try:
+        for name, strategy in STRATEGIES.items():
+            if args.strategy in (name, "all"):
+                report["benchmarks"][f"products.list_all[{name}]"] = _measure(strategy, connection, args.repeat)
+                connection.rollback()
+    finally:
+        connection.close()
+    sys.exit(finish(report, args.output, args.baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROOT_DIR = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(ROOT_DIR)
+
+from benchmarks.results import new_report, finish
+
+# What a worker does before it can serve: import the module and build the application.
+TARGETS = {
+    "wsgi": ("import app; app.create_app()", {"DEV_MODE": "0"}),
+    "wsgi_dev": ("import app; app.create_app()", {"DEV_MODE": "1"}),
+    "asgi": ("import asgi", {"DEV_MODE": "0"}),
+}
+# -X importtime lines: "import time: <self us> | <cumulative us> | <indent><module>".
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$")
+
+
+def _run(code: str, env: dict) -> tuple:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return elapsed, result.stderr.splitlines()
+
+
+def _import_costs(lines: list) -> dict:
+    # Self time summed per top-level package: every microsecond is counted exactly once,
+    # unlike cumulative times, which nest (flask includes werkzeug, app includes everything).
+    costs = defaultdict(int)
+    for line in lines:
+        match = IMPORT_LINE.match(line)
+        if match:
+            costs[match.group(3).split(".")[0]] += int(match.group(1))
+    return costs
+
+
+def _measure(code: str, env: dict, repeat: int, top: int) -> dict:
+    walls, imports, counts = [], [], []
+    costs = defaultdict(list)
+    for _ in range(repeat):
+        elapsed, lines = _run(code, env)
+        run_costs = _import_costs(lines)
+        walls.append(elapsed)
+        imports.append(sum(run_costs.values()) / 1000)
+        counts.append(sum(1 for line in lines if IMPORT_LINE.match(line)))
+        for package, cost in run_costs.items():
+            costs[package].append(cost)
+
+    heaviest = sorted(costs.items(), key=lambda item: -min(item[1]))[:top]
+    print("  " + ", ".join(f"{package} {min(values) / 1000:.1f}ms" for package, values in heaviest))
+    return {
+        "wall_time": {"value": min(walls) * 1000, "unit": "ms", "better": "lower"},
+        "import_time": {"value": min(imports), "unit": "ms", "better": "lower"},
+        "modules": {"value": min(counts), "unit": "", "better": "lower"},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start cost of the application: process start and imports")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per target; the fastest one is reported")
+    parser.add_argument("--target", choices=[*TARGETS, "all"], default="all")
+    parser.add_argument("--top", type=int, default=8, help="print the N most expensive top-level imports")
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    report = new_report("startup", vars(args))
+    for name, (code, overrides) in TARGETS.items():
+        if args.target not in (name, "all"):
+            continue
+        env = {**os.environ, **overrides}
+        print(f"{name}:")
+        report["benchmarks"][f"startup[{name}]"] = _measure(code, env, args.repeat, args.top)
+    sys.exit(finish(report, args.output, args.baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
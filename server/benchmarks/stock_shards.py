@@ -0,0 +1,166 @@
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(ROOT_DIR)
+
+from infrastructure.repositories.postgresql_repositories import PostgresConnectionPool
+from infrastructure.repositories.postgresql_unit_of_work import PostgresUnitOfWork
+from usecases.add_product_to_order import OrderService, InsufficientStockError
+from benchmarks.load import ProductPicker
+from benchmarks.results import new_report, latency_metrics, finish
+
+
+class ShardFixture:
+    """Benchmark-only orders (one per client thread) and products, removed again on exit."""
+
+    def __init__(self, pool: PostgresConnectionPool, n_products: int, n_orders: int, stock: int):
+        self.pool = pool
+        self.n_products = n_products
+        self.n_orders = n_orders
+        self.stock = stock
+
+    def __enter__(self):
+        with self.pool.connection() as connection:
+            cur = connection.conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO orders (status, notes)
+                SELECT 'new', 'shard benchmark' FROM generate_series(1, %s)
+                RETURNING id
+                """,
+                (self.n_orders,)
+            )
+            self.order_ids = sorted(row[0] for row in cur.fetchall())
+            cur.execute(
+                """
+                INSERT INTO products (name, price, stock, is_active)
+                SELECT 'Shard benchmark ' || n, 10, %s, TRUE FROM generate_series(1, %s) AS n
+                RETURNING id
+                """,
+                (self.stock, self.n_products)
+            )
+            self.product_ids = sorted(row[0] for row in cur.fetchall())
+            connection.commit()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self.pool.connection() as connection:
+            cur = connection.conn.cursor()
+            cur.execute("DELETE FROM orders WHERE id = ANY(%s)", (self.order_ids,))
+            cur.execute("DELETE FROM products WHERE id = ANY(%s)", (self.product_ids,))
+            connection.commit()
+
+    def reset(self, shards: int) -> None:
+        with self.pool.connection() as connection:
+            cur = connection.conn.cursor()
+            cur.execute("DELETE FROM order_items WHERE order_id = ANY(%s)", (self.order_ids,))
+            cur.execute(
+                "SELECT reshard_product_stock(id, %s, %s, 0) FROM unnest(%s::int[]) AS id",
+                (shards, self.stock, self.product_ids)
+            )
+            connection.commit()
+
+    def accounting(self) -> dict:
+        with self.pool.connection() as connection:
+            cur = connection.conn.cursor()
+            cur.execute(
+                """
+                SELECT
+                    coalesce(sum(reserved), 0),
+                    count(*) FILTER (WHERE reserved > stock),
+                    (SELECT count(*) FROM product_stock_shards WHERE product_id = ANY(%(ids)s) AND reserved > stock)
+                FROM product_inventory WHERE id = ANY(%(ids)s)
+                """,
+                {"ids": self.product_ids}
+            )
+            reserved, oversold, oversold_shards = cur.fetchone()
+            connection.rollback()
+        return {"reserved": int(reserved), "oversold": oversold + oversold_shards}
+
+
+def _run(fixture: ShardFixture, picker: ProductPicker, args) -> dict:
+    deadline = time.monotonic() + args.duration
+    lock = threading.Lock()
+    latencies = []
+    counts = {"ok": 0, "rejected": 0}
+
+    def client(index: int):
+        rng = random.Random(args.seed + index)
+        order_id = fixture.order_ids[index]
+        local = []
+        ok = rejected = 0
+        while time.monotonic() < deadline:
+            product_id = picker.pick(rng)[0]
+            started = time.perf_counter()
+            try:
+                OrderService(PostgresUnitOfWork(fixture.pool)).add_product_to_order(order_id, product_id, args.quantity)
+                ok += 1
+            except InsufficientStockError:
+                rejected += 1
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            counts["ok"] += ok
+            counts["rejected"] += rejected
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    metrics = latency_metrics(latencies, elapsed)
+    accounting = fixture.accounting()
+    metrics["rejected"] = {"value": counts["rejected"], "unit": "", "better": None}
+    metrics["oversold"] = {"value": accounting["oversold"], "unit": "", "better": "lower"}
+    metrics["reservation_mismatch"] = {
+        "value": accounting["reserved"] - counts["ok"] * args.quantity, "unit": "", "better": None
+    }
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-row vs sharded stock counters under skewed concurrent load")
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--skew", choices=["uniform", "zipf"], default="zipf")
+    parser.add_argument("--zipf-s", type=float, default=1.2)
+    parser.add_argument("--stock", type=int, default=10 ** 9, help="per product; lower it to exercise rejections")
+    parser.add_argument("--quantity", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    report = new_report("stock_shards", vars(args))
+    pool = PostgresConnectionPool(min_size=1, max_size=args.concurrency + 1)
+    try:
+        with ShardFixture(pool, args.products, args.concurrency, args.stock) as fixture:
+            picker = ProductPicker(fixture.product_ids, args.skew, args.zipf_s, args.seed)
+            for shards in (1, args.shards):
+                fixture.reset(shards)
+                name = f"reserve.{args.skew}.c{args.concurrency}.shards{shards}"
+                report["benchmarks"][name] = _run(fixture, picker, args)
+    finally:
+        pool.closeall()
+
+    code = finish(report, args.output, args.baseline, args.tolerance)
+    if any(metrics["oversold"]["value"] or metrics["reservation_mismatch"]["value"]
+           for metrics in report["benchmarks"].values()):
+        print("Stock accounting is inconsistent: oversold products or reservations that do not match")
+        code = 1
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
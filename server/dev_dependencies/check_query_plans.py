@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(ROOT_DIR)
+
+from domain.models import OrderItem
+from infrastructure.repositories.postgresql_repositories import (
+    PostgresConnection,
+    PostgresCatalogRepository,
+    PostgresProductRepository,
+    PostgresCustomerRepository,
+    PostgresOrderRepository,
+    PostgresOrderItemRepository
+)
+
+
+class ExplainingCursor:
+    def __init__(self, connection: "ExplainingConnection", cursor):
+        self._connection = connection
+        self._cursor = cursor
+
+    def execute(self, sql, params=None):
+        prefix = b"EXPLAIN (FORMAT JSON) " if isinstance(sql, bytes) else "EXPLAIN (FORMAT JSON) "
+        explain = self._connection.connection.conn.cursor()
+        explain.execute(prefix + sql, params)
+        self._connection.plans.append((sql, explain.fetchone()[0][0]["Plan"]))
+        explain.close()
+        return self._cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class ExplainingConnection:
+    def __init__(self, connection: PostgresConnection):
+        self.connection = connection
+        self.plans = []
+
+    def cursor(self):
+        return ExplainingCursor(self, self.connection.cursor())
+
+    def named_cursor(self, itersize=None):
+        return ExplainingCursor(self, self.connection.named_cursor(itersize))
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self.connection.rollback()
+
+
+def _seq_scans(plan):
+    if plan["Node Type"] == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from _seq_scans(child)
+
+
+def _indexes(plan):
+    if "Index Name" in plan:
+        yield plan["Index Name"]
+    for child in plan.get("Plans", []):
+        yield from _indexes(child)
+
+
+def _first(rows):
+    # Generators run their query on the first next(); closing them releases the server-side cursor.
+    try:
+        return next(rows, None)
+    finally:
+        rows.close()
+
+
+def _sample_ids(connection: PostgresConnection) -> dict:
+    cur = connection.conn.cursor()
+    cur.execute(
+        """
+        SELECT
+            (SELECT max(id) FROM products),
+            (SELECT max(id) FROM customers),
+            (SELECT max(id) FROM orders),
+            (SELECT max(id) FROM catalog_containers),
+            (SELECT max(id) FROM product_catalogs),
+            (SELECT order_id FROM order_items ORDER BY id DESC LIMIT 1),
+            (SELECT product_id FROM order_items ORDER BY id DESC LIMIT 1),
+            (SELECT split_part(name, ' ', 1) FROM products ORDER BY id DESC LIMIT 1),
+            (SELECT max(order_date) FROM orders)
+        """
+    )
+    row = cur.fetchone()
+    cur.close()
+    if None in row:
+        raise SystemExit("Seed the database first (see /dev/gen_test_story)")
+    keys = (
+        "product", "customer", "order", "container", "catalog", "item_order", "item_product", "product_word", "order_date"
+    )
+    return dict(zip(keys, row))
+
+
+def _table_sizes(connection: PostgresConnection) -> dict:
+    # Right after a COPY seed reltuples is -1 (never analyzed) or stale, and the plans themselves are
+    # built from those statistics: refresh them first so both the sizes and the plans are real.
+    cur = connection.conn.cursor()
+    cur.execute("ANALYZE")
+    cur.execute("SELECT relname, reltuples FROM pg_class WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace")
+    sizes = {name: rows for name, rows in cur.fetchall()}
+    cur.close()
+    connection.commit()
+    return sizes
+
+
+def _order_item(order_id: int, product_id: int) -> OrderItem:
+    return OrderItem(
+        id=None, order_id=order_id, product_id=product_id, product_name="plan check",
+        unit_price=1, quantity=1, created_at=datetime.utcnow(), is_active=True
+    )
+
+
+def build_checks(ids: dict):
+    # (name, call) or (name, call, index): the third element names an index the plan must use, for
+    # queries where an index scan in the wrong order would read the whole table without a Seq Scan.
+    return [
+        ("catalogs.get_container_by_id", lambda r: r["catalogs"].get_container_by_id(ids["container"])),
+        ("catalogs.get_catalog_by_id", lambda r: r["catalogs"].get_catalog_by_id(ids["catalog"])),
+        ("catalogs.list_descendant_containers", lambda r: r["catalogs"].list_descendant_containers(ids["container"])),
+        ("catalogs.list_subtree_products", lambda r: r["catalogs"].list_subtree_products(ids["container"], None, 50)),
+        ("products.get_by_id", lambda r: r["products"].get_by_id(ids["product"])),
+        ("products.get_many", lambda r: r["products"].get_many([ids["product"], ids["product"] - 1], for_update=True)),
+        ("products.reserve", lambda r: r["products"].reserve(ids["product"], 1)),
+        ("products.reserve_many", lambda r: r["products"].reserve_many({ids["product"]: 1, ids["product"] - 1: 1})),
+        ("products.list_page", lambda r: r["products"].list_page(ids["product"] // 2, 50)),
+        ("products.search", lambda r: r["products"].search(ids["product_word"], None, 20)),
+        ("products.search[catalog]", lambda r: r["products"].search(ids["product_word"], ids["catalog"], 20)),
+        ("products.update", lambda r: r["products"].update(r["products"].get_by_id(ids["product"]))),
+        ("customers.get_by_id", lambda r: r["customers"].get_by_id(ids["customer"])),
+        ("customers.list_page", lambda r: r["customers"].list_page(ids["customer"] // 2, 50)),
+        ("customers.update", lambda r: r["customers"].update(r["customers"].get_by_id(ids["customer"]))),
+        ("orders.get_by_id", lambda r: r["orders"].get_by_id(ids["order"])),
+        ("orders.list_page", lambda r: r["orders"].list_page(ids["order"] // 2, 50)),
+        ("orders.list_by_customer", lambda r: r["orders"].list_by_customer(ids["customer"], None, 50)),
+        ("orders.update", lambda r: r["orders"].update(r["orders"].get_by_id(ids["order"]))),
+        (
+            "orders.iter_with_items",
+            lambda r: _first(r["orders"].iter_with_items(
+                ["new", "completed"], ids["order_date"] - timedelta(days=1), ids["order_date"]
+            )),
+            "orders_order_date_idx"
+        ),
+        ("order_items.list_by_order", lambda r: r["order_items"].list_by_order(ids["item_order"])),
+        (
+            "order_items.get_by_order_and_product",
+            lambda r: r["order_items"].get_by_order_and_product(ids["item_order"], ids["item_product"])
+        ),
+        ("order_items.upsert", lambda r: r["order_items"].upsert(_order_item(ids["item_order"], ids["item_product"]))),
+        (
+            "order_items.add_many",
+            lambda r: r["order_items"].add_many([_order_item(ids["item_order"], ids["item_product"])])
+        ),
+        (
+            "order_items.update",
+            lambda r: r["order_items"].update(
+                r["order_items"].get_by_order_and_product(ids["item_order"], ids["item_product"])
+            )
+        ),
+    ]
+
+
+def check_query_plans(min_rows: int = 10000, verbose: bool = False) -> list:
+    connection = PostgresConnection()
+    explaining = ExplainingConnection(connection)
+    repositories = {
+        "catalogs": PostgresCatalogRepository(explaining),
+        "products": PostgresProductRepository(explaining),
+        "customers": PostgresCustomerRepository(explaining),
+        "orders": PostgresOrderRepository(explaining),
+        "order_items": PostgresOrderItemRepository(explaining),
+    }
+    failures = []
+    try:
+        ids = _sample_ids(connection)
+        sizes = _table_sizes(connection)
+        for name, call, *index in build_checks(ids):
+            explaining.plans = []
+            call(repositories)
+            for sql, plan in explaining.plans:
+                problems = []
+                # A table of unknown size (reltuples -1, or not found) counts as large.
+                scanned = [table for table in _seq_scans(plan) if not 0 <= sizes.get(table, -1) < min_rows]
+                if scanned:
+                    problems.append(f"sequential scan on {', '.join(scanned)}")
+                if index and index[0] not in _indexes(plan):
+                    problems.append(f"does not use {index[0]}")
+                if problems:
+                    failures.append((name, "; ".join(problems), plan))
+                if verbose:
+                    print(f"{name}: {'; '.join(problems) or 'ok'}")
+    finally:
+        connection.rollback()
+        connection.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fail if a repository query plans a seq scan on a large table or misses its expected index"
+    )
+    parser.add_argument("--min-rows", type=int, default=10000)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    failures = check_query_plans(args.min_rows, args.verbose)
+    for name, problem, plan in failures:
+        print(f"{name}: {problem}")
+        print(json.dumps(plan, indent=2))
+    if failures:
+        sys.exit(1)
+    print("All repository queries use indexes")
+
+
+if __name__ == "__main__":
+    main()
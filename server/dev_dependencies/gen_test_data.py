@@ -1,21 +1,202 @@
+import argparse
+import csv
+import io
+import multiprocessing
+import os
 import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import psycopg2
 from faker import Faker
-from datetime import datetime
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(ROOT_DIR)
 
 from infrastructure.config import Config
 
+ORDER_STATUSES = ["new", "processing", "completed", "canceled"]
+# Bulk orders are dated within this fixed year, so date-range exports, order history pages and the
+# order_date indexes see realistic spread, and the same seed still gives the same dataset.
+ORDER_DATES_FROM = datetime(2024, 1, 1)
+ORDER_DATES_SPAN = int(timedelta(days=366).total_seconds())
+
+
+def _connect():
+    return psycopg2.connect(
+        dbname=Config.POSTGRES_DB,
+        user=Config.POSTGRES_USER,
+        password=Config.POSTGRES_PASSWORD,
+        host=Config.POSTGRES_HOST,
+        port=Config.POSTGRES_PORT
+    )
+
+
+def _copy_rows(cur, table: str, columns: tuple, rows, chunk_size: int) -> int:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    pending = 0
+    done = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_size:
+            buffer.seek(0)
+            cur.copy_expert(sql, buffer)
+            done += pending
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        buffer.seek(0)
+        cur.copy_expert(sql, buffer)
+        done += pending
+    return done
+
+
+def _container_rows(ids, rng, fake, ctx, cur):
+    for container_id in ids:
+        yield container_id, fake.word().capitalize() + " Container", fake.sentence(), True
+
+
+def _catalog_rows(ids, rng, fake, ctx, cur):
+    containers = ctx["containers"]
+    for catalog_id in ids:
+        yield (
+            catalog_id,
+            fake.word().capitalize() + " Catalog",
+            fake.sentence(),
+            containers[rng.randrange(len(containers))],
+            True
+        )
+
+
+def _product_rows(ids, rng, fake, ctx, cur):
+    catalogs = ctx["catalogs"]
+    for product_id in ids:
+        yield (
+            product_id,
+            fake.word().capitalize(),
+            fake.text(max_nb_chars=100),
+            round(rng.uniform(5, 500), 2),
+            rng.randint(0, 100),
+            catalogs[rng.randrange(len(catalogs))],
+            True
+        )
+
+
+def _customer_rows(ids, rng, fake, ctx, cur):
+    for customer_id in ids:
+        if rng.random() < 0.7:
+            cust_type, name, tax_id = "individual", fake.name(), None
+        else:
+            cust_type, name, tax_id = "company", fake.company(), fake.ssn()
+        yield customer_id, name, cust_type, fake.address(), fake.email(), fake.phone_number(), tax_id, True
+
+
+def _order_rows(ids, rng, fake, ctx, cur):
+    customers = ctx["customers"]
+    for order_id in ids:
+        yield (
+            order_id,
+            customers[rng.randrange(len(customers))],
+            ORDER_STATUSES[rng.randrange(len(ORDER_STATUSES))],
+            ORDER_DATES_FROM + timedelta(seconds=rng.randrange(ORDER_DATES_SPAN)),
+            fake.address(),
+            fake.sentence()
+        )
+
+
+def _load_products(cur, products: range, loaded: dict):
+    # loaded lives for one generation run (or one worker process of it), so the names and prices
+    # are read once per run and released with it.
+    if loaded.get("products") != products:
+        cur.execute(
+            "SELECT name, price FROM products WHERE id >= %s AND id < %s ORDER BY id",
+            (products.start, products.stop)
+        )
+        names = []
+        prices = []
+        for name, price in cur:
+            names.append(name)
+            prices.append(price)
+        loaded.update(products=products, names=names, prices=prices)
+    return loaded["names"], loaded["prices"]
+
+
+def _order_item_rows(ids, rng, fake, ctx, cur):
+    # Each order gets distinct products so the (order_id, product_id) constraint holds.
+    orders = ctx["orders"]
+    products = ctx["products"]
+    names, prices = _load_products(cur, products, ctx["loaded"])
+    per_order, remainder = divmod(ctx["n_order_items"], len(orders))
+    for order_id in ids:
+        index = order_id - orders.start
+        count = min(per_order + (1 if index < remainder else 0), len(products))
+        for offset in rng.sample(range(len(products)), count):
+            yield order_id, products[offset], names[offset], prices[offset], rng.randint(1, 5), True
+
+
+SEEDERS = {
+    "catalog_containers": (("id", "name", "description", "is_active"), _container_rows),
+    "product_catalogs": (("id", "name", "description", "parent_container_id", "is_active"), _catalog_rows),
+    "products": (
+        ("id", "name", "description", "price", "stock", "product_catalog_id", "is_active"),
+        _product_rows
+    ),
+    "customers": (("id", "name", "type", "address", "email", "phone", "tax_id", "is_active"), _customer_rows),
+    "orders": (("id", "customer_id", "status", "order_date", "delivery_address", "notes"), _order_rows),
+    "order_items": (
+        ("order_id", "product_id", "product_name", "unit_price", "quantity", "is_active"),
+        _order_item_rows
+    ),
+}
+
+
+def _seed_partition(conn, task, loaded: dict) -> int:
+    table, start, stop, seed, ctx, chunk_size = task
+    ctx = {**ctx, "loaded": loaded}
+    rng = random.Random(seed)
+    fake = Faker()
+    fake.seed_instance(seed)
+    columns, rows = SEEDERS[table]
+    cur = conn.cursor()
+    try:
+        return _copy_rows(cur, table, columns, rows(range(start, stop), rng, fake, ctx, cur), chunk_size)
+    finally:
+        cur.close()
+
+
+_worker_conn = None
+_worker_loaded = None
+
+
+def _init_worker():
+    global _worker_conn, _worker_loaded
+    _worker_conn = _connect()
+    _worker_loaded = {}
+
+
+def _run_partition(task) -> int:
+    try:
+        count = _seed_partition(_worker_conn, task, _worker_loaded)
+        _worker_conn.commit()
+        return count
+    except Exception:
+        _worker_conn.rollback()
+        raise
+
 
 class TestDataGenerator:
-    def __init__(self):
+    def __init__(self, chunk_size: int = 10000, progress=None, seed: int = None, workers: int = 1):
         self.fake = Faker()
-        self.conn = psycopg2.connect(
-            dbname=Config.POSTGRES_DB,
-            user=Config.POSTGRES_USER,
-            password=Config.POSTGRES_PASSWORD,
-            host=Config.POSTGRES_HOST,
-            port=Config.POSTGRES_PORT
-        )
+        self.chunk_size = chunk_size
+        self.progress = progress or self._print_progress
+        self.seed = seed if seed is not None else random.randrange(2 ** 31)
+        self.workers = workers
+        self._partition_index = 0
+        self.conn = _connect()
         self.cur = self.conn.cursor()
 
     def seed_catalog_containers(self, n=5):
@@ -112,7 +293,9 @@ class TestDataGenerator:
             quantity = random.randint(1, 5)
             self.cur.execute("""
                 INSERT INTO order_items (order_id, product_id, product_name, unit_price, quantity, is_active)
-                VALUES (%s, %s, %s, %s, %s, %s);
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON CONFLICT (order_id, product_id)
+                DO UPDATE SET quantity = order_items.quantity + EXCLUDED.quantity;
             """, (
                 order,
                 product,
@@ -122,6 +305,74 @@ class TestDataGenerator:
                 True
             ))
 
+    def _print_progress(self, table: str, done: int, total: int):
+        print(f"Seeding {table}: {done}/{total}")
+
+    def _reserve_ids(self, table: str, n: int) -> range:
+        # Moves the sequence past the whole block at once so the rows can be copied with explicit ids.
+        self.cur.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, 'id'), nextval(pg_get_serial_sequence(%s, 'id')) + %s - 1)",
+            (table, table, n)
+        )
+        last_id = self.cur.fetchone()[0]
+        return range(last_id - n + 1, last_id + 1)
+
+    def _partitions(self, table: str, ids: range, ctx: dict, per_partition: int):
+        # Seeds depend only on the partition index, so the output does not depend on the worker count.
+        for start in range(ids.start, ids.stop, per_partition):
+            stop = min(start + per_partition, ids.stop)
+            yield table, start, stop, self.seed + self._partition_index, ctx, self.chunk_size
+            self._partition_index += 1
+
+    def _seed_table(self, executor, table: str, ids: range, ctx: dict, total: int, per_partition: int = None):
+        tasks = list(self._partitions(table, ids, ctx, per_partition or self.chunk_size))
+        done = 0
+        if executor is None:
+            loaded = {}
+            for task in tasks:
+                done += _seed_partition(self.conn, task, loaded)
+                self.progress(table, done, total)
+            return done
+        for future in as_completed([executor.submit(_run_partition, task) for task in tasks]):
+            done += future.result()
+            self.progress(table, done, total)
+        return done
+
+    def gen_test_data_bulk(self, nCatalogs:int, nProducts:int, nCustomers:int, nOrders:int, nOrderItems:int, nContainers:int = 5):
+        self._partition_index = 0
+        executor = None
+        if self.workers > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        try:
+            ctx = {"n_order_items": nOrderItems}
+            ctx["containers"] = self._reserve_ids("catalog_containers", nContainers)
+            self._seed_table(executor, "catalog_containers", ctx["containers"], ctx, nContainers)
+            ctx["catalogs"] = self._reserve_ids("product_catalogs", nCatalogs)
+            self._seed_table(executor, "product_catalogs", ctx["catalogs"], ctx, nCatalogs)
+            ctx["products"] = self._reserve_ids("products", nProducts)
+            self._seed_table(executor, "products", ctx["products"], ctx, nProducts)
+            ctx["customers"] = self._reserve_ids("customers", nCustomers)
+            self._seed_table(executor, "customers", ctx["customers"], ctx, nCustomers)
+            ctx["orders"] = self._reserve_ids("orders", nOrders)
+            self._seed_table(executor, "orders", ctx["orders"], ctx, nOrders)
+
+            items_per_order = max(1, nOrderItems // nOrders)
+            self._seed_table(
+                executor, "order_items", ctx["orders"], ctx, nOrderItems,
+                per_partition=max(1, self.chunk_size // items_per_order)
+            )
+            self.conn.commit()
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            self.cur.close()
+            self.conn.close()
+        return self.seed
+
     def gen_test_data(self, nCatalogs:int, nProducts:int, nCustomers:int, nOrders:int, nOrderItems:int):
         containers = self.seed_catalog_containers()
         catalogs = self.seed_product_catalogs(containers, nCatalogs)
@@ -134,3 +385,36 @@ class TestDataGenerator:
         self.cur.close()
         self.conn.close()
 
+
+
+def run_test_story(story: dict):
+    generator = TestDataGenerator(chunk_size=story["chunk_size"], seed=story["seed"], workers=story["workers"])
+    counts = (story["n_catalogs"], story["n_products"], story["n_customers"], story["n_orders"], story["n_order_items"])
+    if story["bulk"]:
+        return generator.gen_test_data_bulk(*counts)
+    generator.gen_test_data(*counts)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a reproducible test dataset")
+    parser.add_argument("--containers", type=int, default=5)
+    parser.add_argument("--catalogs", type=int, required=True)
+    parser.add_argument("--products", type=int, required=True)
+    parser.add_argument("--customers", type=int, required=True)
+    parser.add_argument("--orders", type=int, required=True)
+    parser.add_argument("--order-items", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    generator = TestDataGenerator(chunk_size=args.chunk_size, seed=args.seed, workers=args.workers)
+    seed = generator.gen_test_data_bulk(
+        args.catalogs, args.products, args.customers, args.orders, args.order_items, args.containers
+    )
+    print(f"Test data generated with seed {seed}")
+
+
+if __name__ == "__main__":
+    main()
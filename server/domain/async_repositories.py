@@ -0,0 +1,48 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from .models import Product, Order, OrderItem
+
+
+class AsyncProductRepository(ABC):
+
+    @abstractmethod
+    async def get_by_id(self, product_id: int) -> Optional[Product]:
+        pass
+
+    @abstractmethod
+    async def get_many(self, product_ids: List[int], for_update: bool = False) -> List[Product]:
+        pass
+
+    @abstractmethod
+    async def reserve(self, product_id: int, quantity: int) -> Optional[Product]:
+        pass
+
+    @abstractmethod
+    async def reserve_many(self, quantities: Dict[int, int]) -> List[Product]:
+        pass
+
+    @abstractmethod
+    async def list_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Product]:
+        pass
+
+
+class AsyncOrderRepository(ABC):
+
+    @abstractmethod
+    async def get_by_id(self, order_id: int, for_update: bool = False) -> Optional[Order]:
+        pass
+
+
+class AsyncOrderItemRepository(ABC):
+
+    @abstractmethod
+    async def list_by_order(self, order_id: int) -> List[OrderItem]:
+        pass
+
+    @abstractmethod
+    async def upsert(self, order_item: OrderItem) -> OrderItem:
+        pass
+
+    @abstractmethod
+    async def add_many(self, order_items: List[OrderItem]) -> List[OrderItem]:
+        pass
@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class CatalogContainer:
     id: Optional[int]
     name: str
@@ -13,7 +13,7 @@ class CatalogContainer:
     updated_at: datetime
     is_active: bool
 
-@dataclass
+@dataclass(slots=True)
 class ProductCatalog:
     id: Optional[int]
     name: str
@@ -23,7 +23,7 @@ class ProductCatalog:
     updated_at: datetime
     is_active: bool
 
-@dataclass
+@dataclass(slots=True)
 class Product:
     id: Optional[int]
     name: str
@@ -41,7 +41,23 @@ class Product:
         return self.stock - self.reserved
 
 
-@dataclass
+@dataclass(slots=True)
+class ProductSearchResult:
+    product: Product
+    rank: float
+
+
+@dataclass(slots=True)
+class ProductImportResult:
+    received: int
+    duplicates: int
+    inserted: int
+    updated: int
+    unchanged: int
+    unknown: int
+
+
+@dataclass(slots=True)
 class Customer:
     id: Optional[int]
     name: str
@@ -55,7 +71,7 @@ class Customer:
     is_active: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     id: Optional[int]
     customer_id: Optional[int]
@@ -65,9 +81,12 @@ class Order:
     notes: Optional[str]
     created_at: datetime
     updated_at: datetime
+    item_count: int = 0
+    total_amount: float = 0
+    items_updated_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderItem:
     id: Optional[int]
     order_id: int
@@ -77,3 +96,6 @@ class OrderItem:
     quantity: int
     created_at: datetime
     is_active: bool
+    reserved_quantity: int = 0
+    reserved_until: Optional[datetime] = None
+    reservation_released_at: Optional[datetime] = None
@@ -1,6 +1,34 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from .models import Product, Order, OrderItem, Customer
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from .models import CatalogContainer, ProductCatalog, Product, ProductSearchResult, Order, OrderItem, Customer
+
+
+class CatalogRepository(ABC):
+
+    @abstractmethod
+    def get_container_by_id(self, container_id: int) -> Optional[CatalogContainer]:
+        pass
+
+    @abstractmethod
+    def get_catalog_by_id(self, catalog_id: int) -> Optional[ProductCatalog]:
+        pass
+
+    @abstractmethod
+    def add_container(self, container: CatalogContainer) -> CatalogContainer:
+        pass
+
+    @abstractmethod
+    def move_container(self, container_id: int, parent_id: Optional[int]) -> None:
+        pass
+
+    @abstractmethod
+    def list_descendant_containers(self, container_id: int) -> List[CatalogContainer]:
+        pass
+
+    @abstractmethod
+    def list_subtree_products(self, container_id: int, after_id: Optional[int] = None, limit: int = 100) -> List[Product]:
+        pass
 
 
 class ProductRepository(ABC):
@@ -9,14 +37,40 @@ class ProductRepository(ABC):
     def get_by_id(self, product_id: int) -> Optional[Product]:
         pass
 
+    @abstractmethod
+    def get_many(self, product_ids: List[int], for_update: bool = False) -> List[Product]:
+        pass
+
     @abstractmethod
     def update(self, product: Product) -> None:
         pass
 
+    @abstractmethod
+    def reserve(self, product_id: int, quantity: int) -> Optional[Product]:
+        pass
+
+    @abstractmethod
+    def reserve_many(self, quantities: Dict[int, int]) -> List[Product]:
+        pass
+
     @abstractmethod
     def list_all(self) -> List[Product]:
         pass
 
+    @abstractmethod
+    def iter_all(self, itersize: Optional[int] = None) -> Iterator[Product]:
+        pass
+
+    @abstractmethod
+    def list_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Product]:
+        pass
+
+    @abstractmethod
+    def search(
+        self, query: str, catalog_id: Optional[int] = None, limit: int = 50, after: Optional[Tuple[float, int]] = None
+    ) -> List[ProductSearchResult]:
+        pass
+
 
 class CustomerRepository(ABC):
 
@@ -28,6 +82,14 @@ class CustomerRepository(ABC):
     def list_all(self) -> List[Customer]:
         pass
 
+    @abstractmethod
+    def iter_all(self, itersize: Optional[int] = None) -> Iterator[Customer]:
+        pass
+
+    @abstractmethod
+    def list_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Customer]:
+        pass
+
     @abstractmethod
     def add(self, customer: Customer) -> Customer:
         pass
@@ -39,7 +101,7 @@ class CustomerRepository(ABC):
 class OrderRepository(ABC):
 
     @abstractmethod
-    def get_by_id(self, order_id: int) -> Optional[Order]:
+    def get_by_id(self, order_id: int, for_update: bool = False) -> Optional[Order]:
         pass
 
     @abstractmethod
@@ -54,6 +116,34 @@ class OrderRepository(ABC):
     def list_all(self) -> List[Order]:
         pass
 
+    @abstractmethod
+    def iter_all(self, itersize: Optional[int] = None) -> Iterator[Order]:
+        pass
+
+    @abstractmethod
+    def iter_with_items(
+        self,
+        statuses: Optional[List[str]] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        itersize: Optional[int] = None
+    ) -> Iterator[Tuple[Order, List[OrderItem]]]:
+        pass
+
+    @abstractmethod
+    def list_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Order]:
+        pass
+
+    @abstractmethod
+    def list_by_customer(
+        self,
+        customer_id: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 50,
+        statuses: Optional[List[str]] = None
+    ) -> List[Order]:
+        pass
+
 
 class OrderItemRepository(ABC):
 
@@ -69,6 +159,14 @@ class OrderItemRepository(ABC):
     def add(self, order_item: OrderItem) -> OrderItem:
         pass
 
+    @abstractmethod
+    def upsert(self, order_item: OrderItem) -> OrderItem:
+        pass
+
+    @abstractmethod
+    def add_many(self, order_items: List[OrderItem]) -> List[OrderItem]:
+        pass
+
     @abstractmethod
     def update(self, order_item: OrderItem) -> None:
         pass
@@ -0,0 +1,45 @@
+from abc import ABC, abstractmethod
+from .async_repositories import AsyncProductRepository, AsyncOrderRepository, AsyncOrderItemRepository
+from .repositories import CatalogRepository, ProductRepository, CustomerRepository, OrderRepository, OrderItemRepository
+
+
+class UnitOfWork(ABC):
+    catalogs: CatalogRepository
+    products: ProductRepository
+    customers: CustomerRepository
+    orders: OrderRepository
+    order_items: OrderItemRepository
+
+    def __enter__(self) -> "UnitOfWork":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.rollback()
+
+    @abstractmethod
+    def commit(self) -> None:
+        pass
+
+    @abstractmethod
+    def rollback(self) -> None:
+        pass
+
+
+class AsyncUnitOfWork(ABC):
+    products: AsyncProductRepository
+    orders: AsyncOrderRepository
+    order_items: AsyncOrderItemRepository
+
+    async def __aenter__(self) -> "AsyncUnitOfWork":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.rollback()
+
+    @abstractmethod
+    async def commit(self) -> None:
+        pass
+
+    @abstractmethod
+    async def rollback(self) -> None:
+        pass
@@ -1,4 +1,8 @@
 #!/bin/bash
-python migrator/migrate.py
+python migrator/migrate.py || exit 1
+
+if [ "$SERVER_MODE" = "asgi" ]; then
+    exec hypercorn asgi:app --bind "0.0.0.0:${FLASK_PORT:-5000}" --workers "${WEB_WORKERS:-1}"
+fi
 
 python app.py
@@ -5,9 +5,31 @@ class Config:
     FLASK_ENV = os.getenv("FLASK_ENV", "production")
     FLASK_DEBUG = int(os.getenv("FLASK_DEBUG", 0))
     FLASK_PORT = int(os.getenv("FLASK_PORT", 5000))
+    # Enables the /dev routes (test data generation, pool and cache stats); on by default in development.
+    DEV_MODE = int(os.getenv("DEV_MODE", 1 if FLASK_ENV == "development" else 0))
     POSTGRES_USER = os.getenv("POSTGRES_USER")
     POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
     POSTGRES_DB = os.getenv("POSTGRES_DB")
     POSTGRES_HOST = os.getenv("POSTGRES_HOST")
     POSTGRES_PORT = int(os.getenv("POSTGRES_PORT", 5432))
-    DATABASE_URL = os.getenv("DATABASE_URL")
\ No newline at end of file
+    DATABASE_URL = os.getenv("DATABASE_URL")
+    POSTGRES_POOL_MIN_SIZE = int(os.getenv("POSTGRES_POOL_MIN_SIZE", 1))
+    POSTGRES_POOL_MAX_SIZE = int(os.getenv("POSTGRES_POOL_MAX_SIZE", 10))
+    POSTGRES_POOL_TIMEOUT = float(os.getenv("POSTGRES_POOL_TIMEOUT", 30))
+    POSTGRES_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("POSTGRES_POOL_HEALTH_CHECK_INTERVAL", 30))
+    # Comma-separated replica DSNs for read-only units of work; empty sends every read to the primary.
+    POSTGRES_REPLICA_URLS = [url.strip() for url in os.getenv("POSTGRES_REPLICA_URLS", "").split(",") if url.strip()]
+    REPLICA_ROUTING = os.getenv("REPLICA_ROUTING", "round_robin")
+    REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", 5))
+    REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", 1))
+    # Seconds a lag check may take to connect or to answer before the replica counts as unreachable.
+    REPLICA_PROBE_TIMEOUT = float(os.getenv("REPLICA_PROBE_TIMEOUT", 2))
+    # Price and availability of the hottest ids for GET/POST /products/availability; size 0 disables it.
+    AVAILABILITY_CACHE_SIZE = int(os.getenv("AVAILABILITY_CACHE_SIZE", 1000))
+    AVAILABILITY_CACHE_TTL = float(os.getenv("AVAILABILITY_CACHE_TTL", 1))
+    STREAM_ITERSIZE = int(os.getenv("STREAM_ITERSIZE", 2000))
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 0))
+    PRODUCT_IMPORT_WORK_MEM = os.getenv("PRODUCT_IMPORT_WORK_MEM", "256MB")
+    RESERVATION_TTL = float(os.getenv("RESERVATION_TTL", 1800))
+    RESERVATION_RELEASE_BATCH_SIZE = int(os.getenv("RESERVATION_RELEASE_BATCH_SIZE", 1000))
+    RESERVATION_RELEASE_INTERVAL = float(os.getenv("RESERVATION_RELEASE_INTERVAL", 10))
@@ -0,0 +1,158 @@
+import functools
+import inspect
+import logging
+import time
+from contextvars import ContextVar
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from psycopg2.extensions import cursor as Cursor
+from infrastructure.config import Config
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = CollectorRegistry()
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+
+QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ["query"],
+    buckets=LATENCY_BUCKETS, registry=REGISTRY
+)
+QUERY_ROWS = Histogram(
+    "db_query_rows", "Rows returned or affected by a SQL statement", ["query"],
+    buckets=ROW_BUCKETS, registry=REGISTRY
+)
+QUERY_ERRORS = Counter("db_query_errors_total", "SQL statements that raised", ["query"], registry=REGISTRY)
+SLOW_QUERIES = Counter(
+    "db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS", ["query"], registry=REGISTRY
+)
+REPOSITORY_DURATION = Histogram(
+    "repository_call_duration_seconds", "Repository method time including all of its statements", ["query"],
+    buckets=LATENCY_BUCKETS, registry=REGISTRY
+)
+POOL_WAIT = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled connection",
+    buckets=LATENCY_BUCKETS, registry=REGISTRY
+)
+POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Connection checkouts that timed out", registry=REGISTRY)
+REPLICA_LAG = Gauge(
+    "db_replica_lag_seconds", "Replay lag of a read replica at its last check (-1 when unknown or unreachable)",
+    ["replica"], registry=REGISTRY
+)
+REPLICA_FALLBACKS = Counter(
+    "db_replica_fallbacks_total", "Read-only units of work sent to the primary because no replica was fresh enough",
+    registry=REGISTRY
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency per route", ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS, registry=REGISTRY
+)
+RESERVATIONS_RELEASED = Counter(
+    "reservations_released_total", "Order lines whose expired reservation was released", registry=REGISTRY
+)
+RESERVED_UNITS_RELEASED = Counter(
+    "reserved_units_released_total", "Reserved units handed back to stock by the release worker", registry=REGISTRY
+)
+RESERVATION_RELEASE_CONFLICTS = Counter(
+    "reservation_release_lock_timeouts_total", "Release batches rolled back after waiting on a lock",
+    registry=REGISTRY
+)
+
+_current_query: ContextVar[str] = ContextVar("current_query", default="unnamed")
+
+
+def _statement_name(sql) -> str:
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    words = str(sql).split(None, 1)
+    return f"raw.{words[0].lower()}" if words else "raw"
+
+
+class InstrumentedCursor(Cursor):
+    def execute(self, query, vars=None):
+        name = _current_query.get()
+        if name == "unnamed":
+            name = _statement_name(query)
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        except Exception:
+            QUERY_ERRORS.labels(name).inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            QUERY_DURATION.labels(name).observe(elapsed)
+            if self.rowcount >= 0:
+                QUERY_ROWS.labels(name).observe(self.rowcount)
+            if Config.SLOW_QUERY_MS and elapsed * 1000 >= Config.SLOW_QUERY_MS:
+                SLOW_QUERIES.labels(name).inc()
+                sql = query.decode("utf-8", "replace") if isinstance(query, bytes) else query
+                logger.warning("Slow query %s took %.1fms: %s", name, elapsed * 1000, " ".join(sql.split())[:500])
+
+
+def _timed(name: str, method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        token = _current_query.set(name)
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            REPOSITORY_DURATION.labels(name).observe(time.perf_counter() - started)
+            _current_query.reset(token)
+
+    @functools.wraps(method)
+    def generator_wrapper(*args, **kwargs):
+        iterator = method(*args, **kwargs)
+        while True:
+            token = _current_query.set(name)
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                REPOSITORY_DURATION.labels(name).observe(time.perf_counter() - started)
+                _current_query.reset(token)
+            yield item
+
+    return generator_wrapper if inspect.isgeneratorfunction(method) else wrapper
+
+
+def instrumented(prefix: str):
+    """Time every public method and label the SQL it runs as "<prefix>.<method>"."""
+    def decorate(cls):
+        for attr, method in list(vars(cls).items()):
+            if not attr.startswith("_") and inspect.isfunction(method):
+                setattr(cls, attr, _timed(f"{prefix}.{attr}", method))
+        return cls
+    return decorate
+
+
+class PoolCollector:
+    def __init__(self):
+        self.pools = {}
+
+    def collect(self):
+        families = {
+            key: GaugeMetricFamily(f"db_pool_{key}", f"Connection pool {key.replace('_', ' ')}", labels=["pool"])
+            for key in ("size", "idle", "in_use", "max_size")
+        }
+        for name, pool in list(self.pools.items()):
+            stats = pool.stats()
+            for key, family in families.items():
+                family.add_metric([name], stats[key])
+        yield from families.values()
+
+
+_pool_collector = PoolCollector()
+REGISTRY.register(_pool_collector)
+
+
+def register_pool(pool, name: str = "primary") -> None:
+    _pool_collector.pools[name] = pool
+
+
+def render() -> tuple:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
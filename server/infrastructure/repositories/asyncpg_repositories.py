@@ -0,0 +1,210 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+import asyncpg
+from domain.models import Product, Order, OrderItem
+from domain.async_repositories import AsyncProductRepository, AsyncOrderRepository, AsyncOrderItemRepository
+from domain.unit_of_work import AsyncUnitOfWork
+from infrastructure.config import Config
+from infrastructure.repositories.postgresql_repositories import (
+    PRODUCT_COLUMNS,
+    P_PRODUCT_COLUMNS,
+    RESERVED_PRODUCT_COLUMNS
+)
+
+
+async def create_pool() -> asyncpg.Pool:
+    return await asyncpg.create_pool(
+        database=Config.POSTGRES_DB,
+        user=Config.POSTGRES_USER,
+        password=Config.POSTGRES_PASSWORD,
+        host=Config.POSTGRES_HOST,
+        port=Config.POSTGRES_PORT,
+        min_size=Config.POSTGRES_POOL_MIN_SIZE,
+        max_size=Config.POSTGRES_POOL_MAX_SIZE
+    )
+
+
+class AsyncpgProductRepository(AsyncProductRepository):
+    def __init__(self, connection: asyncpg.Connection):
+        self.connection = connection
+
+    async def get_by_id(self, product_id: int) -> Optional[Product]:
+        row = await self.connection.fetchrow(f"SELECT {PRODUCT_COLUMNS} FROM product_inventory WHERE id = $1", product_id)
+        if row:
+            return Product(**row)
+        return None
+
+    async def get_many(self, product_ids: List[int], for_update: bool = False) -> List[Product]:
+        if not product_ids:
+            return []
+        product_ids = sorted(set(product_ids))
+        if for_update:
+            # See PostgresProductRepository.get_many: sharded products are locked per shard.
+            await self.connection.execute(
+                "SELECT id FROM products WHERE id = ANY($1::int[]) AND stock_shards = 1 ORDER BY id FOR UPDATE",
+                product_ids
+            )
+        rows = await self.connection.fetch(
+            f"SELECT {PRODUCT_COLUMNS} FROM product_inventory WHERE id = ANY($1::int[]) ORDER BY id", product_ids
+        )
+        return [Product(**row) for row in rows]
+
+    async def reserve(self, product_id: int, quantity: int) -> Optional[Product]:
+        row = await self.connection.fetchrow(
+            f"""
+            SELECT {RESERVED_PRODUCT_COLUMNS}
+            FROM reserve_stock($1, $2) r
+            JOIN products p ON p.id = r.product_id
+            """,
+            product_id, quantity
+        )
+        if row:
+            return Product(**row)
+        return None
+
+    async def reserve_many(self, quantities: Dict[int, int]) -> List[Product]:
+        if not quantities:
+            return []
+        product_ids = sorted(quantities)
+        rows = await self.connection.fetch(
+            f"""
+            WITH req AS (
+                SELECT * FROM unnest($2::int[], $3::int[]) AS req(product_id, quantity)
+            ), single AS (
+                UPDATE products p
+                SET reserved = p.reserved + req.quantity, updated_at = $1
+                FROM req
+                WHERE p.id = req.product_id AND p.stock_shards = 1 AND p.stock - p.reserved >= req.quantity
+                RETURNING {P_PRODUCT_COLUMNS}
+            ), sharded AS (
+                SELECT {RESERVED_PRODUCT_COLUMNS}
+                FROM req
+                JOIN products p ON p.id = req.product_id AND p.stock_shards > 1
+                CROSS JOIN LATERAL reserve_stock(p.id, req.quantity) r
+            )
+            SELECT * FROM single
+            UNION ALL
+            SELECT * FROM sharded
+            """,
+            datetime.utcnow(), product_ids, [quantities[product_id] for product_id in product_ids]
+        )
+        return sorted((Product(**row) for row in rows), key=lambda product: product.id)
+
+    async def list_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Product]:
+        rows = await self.connection.fetch(
+            f"SELECT {PRODUCT_COLUMNS} FROM product_inventory WHERE id > $1 ORDER BY id LIMIT $2", after_id or 0, limit
+        )
+        return [Product(**row) for row in rows]
+
+
+class AsyncpgOrderRepository(AsyncOrderRepository):
+    def __init__(self, connection: asyncpg.Connection):
+        self.connection = connection
+
+    async def get_by_id(self, order_id: int, for_update: bool = False) -> Optional[Order]:
+        # See PostgresOrderRepository.get_by_id: the order is locked before its lines.
+        lock = " FOR NO KEY UPDATE" if for_update else ""
+        row = await self.connection.fetchrow(f"SELECT * FROM orders WHERE id = $1{lock}", order_id)
+        if row:
+            return Order(**row)
+        return None
+
+
+class AsyncpgOrderItemRepository(AsyncOrderItemRepository):
+    def __init__(self, connection: asyncpg.Connection):
+        self.connection = connection
+
+    async def list_by_order(self, order_id: int) -> List[OrderItem]:
+        rows = await self.connection.fetch("SELECT * FROM order_items WHERE order_id = $1", order_id)
+        return [OrderItem(**row) for row in rows]
+
+    async def upsert(self, order_item: OrderItem) -> OrderItem:
+        row = await self.connection.fetchrow(
+            """
+            INSERT INTO order_items (
+                order_id, product_id, product_name, unit_price, quantity, created_at, is_active,
+                reserved_quantity, reserved_until
+            )
+            VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9)
+            ON CONFLICT (order_id, product_id)
+            DO UPDATE SET
+                quantity = order_items.quantity + EXCLUDED.quantity,
+                reserved_quantity = order_items.reserved_quantity + EXCLUDED.reserved_quantity,
+                reserved_until = EXCLUDED.reserved_until
+            RETURNING *
+            """,
+            order_item.order_id, order_item.product_id, order_item.product_name,
+            order_item.unit_price, order_item.quantity, order_item.created_at, order_item.is_active,
+            order_item.reserved_quantity, order_item.reserved_until
+        )
+        return OrderItem(**row)
+
+    async def add_many(self, order_items: List[OrderItem]) -> List[OrderItem]:
+        if not order_items:
+            return []
+        rows = await self.connection.fetch(
+            """
+            INSERT INTO order_items (
+                order_id, product_id, product_name, unit_price, quantity, created_at, is_active,
+                reserved_quantity, reserved_until
+            )
+            SELECT * FROM unnest(
+                $1::int[], $2::int[], $3::varchar[], $4::numeric[], $5::int[], $6::timestamp[], $7::boolean[],
+                $8::int[], $9::timestamp[]
+            )
+            ON CONFLICT (order_id, product_id)
+            DO UPDATE SET
+                quantity = order_items.quantity + EXCLUDED.quantity,
+                reserved_quantity = order_items.reserved_quantity + EXCLUDED.reserved_quantity,
+                reserved_until = EXCLUDED.reserved_until
+            RETURNING *
+            """,
+            [item.order_id for item in order_items],
+            [item.product_id for item in order_items],
+            [item.product_name for item in order_items],
+            [item.unit_price for item in order_items],
+            [item.quantity for item in order_items],
+            [item.created_at for item in order_items],
+            [item.is_active for item in order_items],
+            [item.reserved_quantity for item in order_items],
+            [item.reserved_until for item in order_items]
+        )
+        return sorted((OrderItem(**row) for row in rows), key=lambda item: item.product_id)
+
+
+class AsyncpgUnitOfWork(AsyncUnitOfWork):
+    def __init__(self, pool: asyncpg.Pool, timeout: float = Config.POSTGRES_POOL_TIMEOUT):
+        self.pool = pool
+        self.timeout = timeout
+        self.connection: Optional[asyncpg.Connection] = None
+        self.transaction = None
+
+    async def __aenter__(self) -> "AsyncpgUnitOfWork":
+        self.connection = await self.pool.acquire(timeout=self.timeout)
+        try:
+            self.transaction = self.connection.transaction()
+            await self.transaction.start()
+        except BaseException:
+            await self.pool.release(self.connection)
+            raise
+        self.products = AsyncpgProductRepository(self.connection)
+        self.orders = AsyncpgOrderRepository(self.connection)
+        self.order_items = AsyncpgOrderItemRepository(self.connection)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            await super().__aexit__(exc_type, exc_value, traceback)
+        finally:
+            await self.pool.release(self.connection)
+            self.connection = None
+            self.transaction = None
+
+    async def commit(self) -> None:
+        await self.transaction.commit()
+        self.transaction = None
+
+    async def rollback(self) -> None:
+        if self.transaction is not None and not self.connection.is_closed():
+            await self.transaction.rollback()
+            self.transaction = None
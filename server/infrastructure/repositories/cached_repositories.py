@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+from domain.models import Product, ProductSearchResult
+from domain.repositories import ProductRepository
+from infrastructure.config import Config
+
+
+class ProductCache:
+    def __init__(self, max_size: int = Config.AVAILABILITY_CACHE_SIZE, ttl: float = Config.AVAILABILITY_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, product_id: int) -> Optional[Product]:
+        with self._lock:
+            entry = self._entries.get(product_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            product, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[product_id]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(product_id)
+            self.hits += 1
+            return product
+
+    def put(self, product: Product) -> None:
+        with self._lock:
+            self._entries[product.id] = (product, time.monotonic() + self.ttl)
+            self._entries.move_to_end(product.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+
+class AvailabilityCachedProductRepository(ProductRepository):
+    """Serves get_many() whole from a short-TTL cache, stock and price included, so a hit runs no query.
+
+    For read-only units of work behind availability lookups, which never write: nothing invalidates an
+    entry, so it may be up to the cache TTL (plus replica lag) old. A product page tolerates that; a
+    reservation locks and reads the row itself and never goes through here.
+    """
+
+    def __init__(self, repository: ProductRepository, cache: ProductCache):
+        self.repository = repository
+        self.cache = cache
+
+    def get_by_id(self, product_id: int) -> Optional[Product]:
+        return self.repository.get_by_id(product_id)
+
+    def get_many(self, product_ids: List[int], for_update: bool = False) -> List[Product]:
+        if for_update:
+            return self.repository.get_many(product_ids, for_update=True)
+
+        products = {}
+        missing = []
+        for product_id in sorted(set(product_ids)):
+            product = self.cache.get(product_id)
+            if product is None:
+                missing.append(product_id)
+            else:
+                products[product_id] = product
+
+        for product in self.repository.get_many(missing):
+            products[product.id] = product
+            self.cache.put(product)
+        return [products[product_id] for product_id in sorted(products)]
+
+    def update(self, product: Product) -> None:
+        self.repository.update(product)
+
+    def reserve(self, product_id: int, quantity: int) -> Optional[Product]:
+        return self.repository.reserve(product_id, quantity)
+
+    def reserve_many(self, quantities: Dict[int, int]) -> List[Product]:
+        return self.repository.reserve_many(quantities)
+
+    def list_all(self) -> List[Product]:
+        return self.repository.list_all()
+
+    def iter_all(self, itersize: Optional[int] = None) -> Iterator[Product]:
+        return self.repository.iter_all(itersize)
+
+    def list_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Product]:
+        return self.repository.list_page(after_id, limit)
+
+    def search(
+        self, query: str, catalog_id: Optional[int] = None, limit: int = 50, after: Optional[Tuple[float, int]] = None
+    ) -> List[ProductSearchResult]:
+        return self.repository.search(query, catalog_id, limit, after)
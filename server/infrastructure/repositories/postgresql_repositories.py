@@ -1,45 +1,357 @@
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from abc import ABC
-from domain.models import Product, Customer, Order, OrderItem
-from domain.repositories import ProductRepository, CustomerRepository, OrderRepository, OrderItemRepository
+from collections import deque
+from itertools import count
+from contextlib import contextmanager
+from dataclasses import fields
+from domain.models import CatalogContainer, ProductCatalog, Product, ProductSearchResult, Customer, Order, OrderItem
+from domain.repositories import (
+    CatalogRepository,
+    ProductRepository,
+    CustomerRepository,
+    OrderRepository,
+    OrderItemRepository
+)
 from infrastructure.config import Config
+from infrastructure.metrics import InstrumentedCursor, POOL_WAIT, POOL_TIMEOUTS, instrumented
+from infrastructure.repositories.row_mapper import row_mapper, fetch_one, fetch_all, map_rows, iter_rows
+import re
+import threading
+import time
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import extensions
+from psycopg2.extras import execute_values
 from datetime import datetime
 
 
+class PoolTimeoutError(Exception): pass
+
+
+# product_inventory carries columns that are not part of the model (search_vector), so it is never selected with *.
+# Reads go through product_inventory, which sums the stock shards of sharded products (migration 009).
+PRODUCT_COLUMNS = ", ".join(field.name for field in fields(Product))
+P_PRODUCT_COLUMNS = ", ".join(f"p.{field.name}" for field in fields(Product))
+# Columns of a product joined with the counters returned by reserve_stock() as r.
+RESERVED_PRODUCT_COLUMNS = ", ".join(
+    f"r.{field.name}" if field.name in ("stock", "reserved", "updated_at") else f"p.{field.name}"
+    for field in fields(Product)
+)
+
+# An order joined with its items, decoded positionally: the first len(ORDER_FIELDS) columns are the order.
+ORDER_FIELDS = [field.name for field in fields(Order)]
+O_ORDER_COLUMNS = ", ".join(f"o.{name}" for name in ORDER_FIELDS)
+I_ORDER_ITEM_COLUMNS = ", ".join(f"i.{field.name}" for field in fields(OrderItem))
+
+
+def to_prefix_tsquery(query: str) -> str:
+    return " & ".join(f"{word}:*" for word in re.findall(r"\w+", query.lower()))
+
+
 class PostgresConnection:
-    def __init__(self):
-        self.conn = psycopg2.connect(
-            dbname=Config.POSTGRES_DB,
-            user=Config.POSTGRES_USER,
-            password=Config.POSTGRES_PASSWORD,
-            host=Config.POSTGRES_HOST,
-            port=Config.POSTGRES_PORT
-        )
+    _cursor_names = count(1)
+
+    def __init__(self, dsn: Optional[str] = None, **options):
+        # Without a DSN this is the primary; replicas are given theirs (Config.POSTGRES_REPLICA_URLS).
+        # options are extra libpq connection parameters, such as connect_timeout.
+        if dsn:
+            self.conn = psycopg2.connect(dsn, **options)
+        else:
+            self.conn = psycopg2.connect(
+                dbname=Config.POSTGRES_DB,
+                user=Config.POSTGRES_USER,
+                password=Config.POSTGRES_PASSWORD,
+                host=Config.POSTGRES_HOST,
+                port=Config.POSTGRES_PORT,
+                **options
+            )
+        self.last_used = time.monotonic()
 
     def cursor(self):
-        return self.conn.cursor(cursor_factory=RealDictCursor)
+        return self.conn.cursor(cursor_factory=InstrumentedCursor)
+
+    def named_cursor(self, itersize: Optional[int] = None):
+        cur = self.conn.cursor(name=f"stream_{next(self._cursor_names)}", cursor_factory=InstrumentedCursor)
+        cur.itersize = itersize or Config.STREAM_ITERSIZE
+        return cur
 
     def commit(self):
         self.conn.commit()
 
+    def rollback(self):
+        self.conn.rollback()
+
     def close(self):
         self.conn.close()
 
+    @property
+    def closed(self) -> bool:
+        return self.conn.closed != 0
+
+    def is_healthy(self) -> bool:
+        if self.closed:
+            return False
+        try:
+            cur = self.conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            self.conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+
+class PostgresConnectionPool:
+    def __init__(
+        self,
+        min_size: int = Config.POSTGRES_POOL_MIN_SIZE,
+        max_size: int = Config.POSTGRES_POOL_MAX_SIZE,
+        timeout: float = Config.POSTGRES_POOL_TIMEOUT,
+        health_check_interval: float = Config.POSTGRES_POOL_HEALTH_CHECK_INTERVAL,
+        lazy: bool = False,
+        dsn: Optional[str] = None
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min {min_size}, max {max_size}")
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._idle = deque()
+        self._size = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+        # A lazy pool opens nothing up front: connections are created by getconn on first use.
+        if not lazy:
+            for _ in range(min_size):
+                self._idle.append(PostgresConnection(dsn))
+                self._size += 1
+
+    def getconn(self) -> PostgresConnection:
+        started = time.monotonic()
+        with self._cond:
+            while not self._idle and self._size >= self.max_size:
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    POOL_TIMEOUTS.inc()
+                    raise PoolTimeoutError(
+                        f"No connection available within {self.timeout}s (pool size {self.max_size})"
+                    )
+                self._cond.wait(remaining)
+
+            connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                self._size += 1
+            self._in_use += 1
+
+        try:
+            if connection is None:
+                connection = PostgresConnection(self.dsn)
+            elif not self._check(connection):
+                connection.close()
+                connection = PostgresConnection(self.dsn)
+                with self._cond:
+                    self._reconnects += 1
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - started
+        POOL_WAIT.observe(waited)
+        with self._cond:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return connection
+
+    def putconn(self, connection: PostgresConnection) -> None:
+        if not connection.closed:
+            try:
+                if connection.conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            except psycopg2.Error:
+                connection.close()
+
+        with self._cond:
+            self._in_use -= 1
+            if connection.closed:
+                self._size -= 1
+            else:
+                connection.last_used = time.monotonic()
+                self._idle.append(connection)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        connection = self.getconn()
+        try:
+            yield connection
+        finally:
+            self.putconn(connection)
+
+    def closeall(self) -> None:
+        with self._cond:
+            while self._idle:
+                self._idle.pop().close()
+                self._size -= 1
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "reconnects": self._reconnects,
+                "wait_time_total": self._wait_total,
+                "wait_time_max": self._wait_max,
+                "wait_time_avg": self._wait_total / self._checkouts if self._checkouts else 0.0
+            }
+
+    def _check(self, connection: PostgresConnection) -> bool:
+        if connection.closed:
+            return False
+        if time.monotonic() - connection.last_used < self.health_check_interval:
+            return True
+        return connection.is_healthy()
+
+
+@instrumented("catalogs")
+class PostgresCatalogRepository(CatalogRepository):
+    def __init__(self, connection: PostgresConnection):
+        self.connection = connection
+
+    def get_container_by_id(self, container_id: int) -> Optional[CatalogContainer]:
+        cur = self.connection.cursor()
+        cur.execute("SELECT * FROM catalog_containers WHERE id = %s", (container_id,))
+        container = fetch_one(cur, CatalogContainer)
+        cur.close()
+        return container
+
+    def get_catalog_by_id(self, catalog_id: int) -> Optional[ProductCatalog]:
+        cur = self.connection.cursor()
+        cur.execute("SELECT * FROM product_catalogs WHERE id = %s", (catalog_id,))
+        catalog = fetch_one(cur, ProductCatalog)
+        cur.close()
+        return catalog
 
+    def add_container(self, container: CatalogContainer) -> CatalogContainer:
+        cur = self.connection.cursor()
+        cur.execute(
+            """
+            INSERT INTO catalog_containers (name, parent_id, description, created_at, updated_at, is_active)
+            VALUES (%s,%s,%s,%s,%s,%s) RETURNING *
+            """,
+            (
+                container.name, container.parent_id, container.description,
+                container.created_at, container.updated_at, container.is_active
+            )
+        )
+        container = fetch_one(cur, CatalogContainer)
+        cur.close()
+        return container
+
+    def move_container(self, container_id: int, parent_id: Optional[int]) -> None:
+        cur = self.connection.cursor()
+        cur.execute(
+            "UPDATE catalog_containers SET parent_id=%s, updated_at=%s WHERE id=%s",
+            (parent_id, datetime.utcnow(), container_id)
+        )
+        cur.close()
+
+    def list_descendant_containers(self, container_id: int) -> List[CatalogContainer]:
+        cur = self.connection.cursor()
+        cur.execute(
+            """
+            SELECT cc.* FROM catalog_container_closure c
+            JOIN catalog_containers cc ON cc.id = c.descendant_id
+            WHERE c.ancestor_id = %s AND c.depth > 0
+            ORDER BY c.depth, cc.id
+            """,
+            (container_id,)
+        )
+        containers = fetch_all(cur, CatalogContainer)
+        cur.close()
+        return containers
+
+    def list_subtree_products(self, container_id: int, after_id: Optional[int] = None, limit: int = 100) -> List[Product]:
+        cur = self.connection.cursor()
+        cur.execute(
+            f"""
+            SELECT {P_PRODUCT_COLUMNS} FROM product_inventory p
+            WHERE p.is_active
+              AND p.id > %(after_id)s
+              AND p.product_catalog_id IN (
+                  SELECT pc.id FROM catalog_container_closure c
+                  JOIN product_catalogs pc ON pc.parent_container_id = c.descendant_id AND pc.is_active
+                  WHERE c.ancestor_id = %(container_id)s
+                    -- An inactive container hides its whole subtree: skip descendants with an inactive
+                    -- container anywhere on the path from container_id down to them, both ends included.
+                    AND NOT EXISTS (
+                        SELECT 1 FROM catalog_container_closure up
+                        JOIN catalog_containers cc ON cc.id = up.ancestor_id AND NOT cc.is_active
+                        JOIN catalog_container_closure down
+                          ON down.ancestor_id = %(container_id)s AND down.descendant_id = up.ancestor_id
+                        WHERE up.descendant_id = c.descendant_id
+                    )
+              )
+            ORDER BY p.id
+            LIMIT %(limit)s
+            """,
+            {"after_id": after_id or 0, "container_id": container_id, "limit": limit}
+        )
+        products = fetch_all(cur, Product)
+        cur.close()
+        return products
+
+
+@instrumented("products")
 class PostgresProductRepository(ProductRepository):
     def __init__(self, connection: PostgresConnection):
         self.connection = connection
 
     def get_by_id(self, product_id: int) -> Optional[Product]:
         cur = self.connection.cursor()
-        cur.execute("SELECT * FROM products WHERE id = %s", (product_id,))
-        row = cur.fetchone()
+        cur.execute(f"SELECT {PRODUCT_COLUMNS} FROM product_inventory WHERE id = %s", (product_id,))
+        product = fetch_one(cur, Product)
         cur.close()
-        if row:
-            return Product(**row)
-        return None
+        return product
+
+    def get_many(self, product_ids: List[int], for_update: bool = False) -> List[Product]:
+        if not product_ids:
+            return []
+        product_ids = sorted(set(product_ids))
+        cur = self.connection.cursor()
+        if for_update:
+            # Sharded products are locked per shard by reserve_stock(); locking their products row
+            # would serialize every reservation of a hot product again.
+            cur.execute(
+                "SELECT id FROM products WHERE id = ANY(%s) AND stock_shards = 1 ORDER BY id FOR UPDATE",
+                (product_ids,)
+            )
+        cur.execute(f"SELECT {PRODUCT_COLUMNS} FROM product_inventory WHERE id = ANY(%s) ORDER BY id", (product_ids,))
+        products = fetch_all(cur, Product)
+        cur.close()
+        return products
 
     def update(self, product: Product) -> None:
         cur = self.connection.cursor()
@@ -49,23 +361,132 @@ class PostgresProductRepository(ProductRepository):
             SET name=%s, description=%s, price=%s, stock=%s, reserved=%s, product_catalog_id=%s,
                 updated_at=%s, is_active=%s
             WHERE id=%s
+            RETURNING stock_shards
             """,
             (
                 product.name, product.description, product.price, product.stock,
                 product.reserved, product.product_catalog_id, datetime.utcnow(), product.is_active, product.id
             )
         )
-        self.connection.commit()
+        row = cur.fetchone()
+        if row and row[0] > 1:
+            cur.execute(
+                "SELECT reshard_product_stock(%s, %s, %s, %s)",
+                (product.id, row[0], product.stock, product.reserved)
+            )
+        cur.close()
+
+    def reserve(self, product_id: int, quantity: int) -> Optional[Product]:
+        cur = self.connection.cursor()
+        cur.execute(
+            f"""
+            SELECT {RESERVED_PRODUCT_COLUMNS}
+            FROM reserve_stock(%s, %s) r
+            JOIN products p ON p.id = r.product_id
+            """,
+            (product_id, quantity)
+        )
+        product = fetch_one(cur, Product)
         cur.close()
+        return product
+
+    def reserve_many(self, quantities: Dict[int, int]) -> List[Product]:
+        if not quantities:
+            return []
+        product_ids = sorted(quantities)
+        cur = self.connection.cursor()
+        cur.execute(
+            f"""
+            WITH req AS (
+                SELECT * FROM unnest(%(product_ids)s::int[], %(quantities)s::int[]) AS req(product_id, quantity)
+            ), single AS (
+                UPDATE products p
+                SET reserved = p.reserved + req.quantity, updated_at = %(now)s
+                FROM req
+                WHERE p.id = req.product_id AND p.stock_shards = 1 AND p.stock - p.reserved >= req.quantity
+                RETURNING {P_PRODUCT_COLUMNS}
+            ), sharded AS (
+                SELECT {RESERVED_PRODUCT_COLUMNS}
+                FROM req
+                JOIN products p ON p.id = req.product_id AND p.stock_shards > 1
+                CROSS JOIN LATERAL reserve_stock(p.id, req.quantity) r
+            )
+            SELECT * FROM single
+            UNION ALL
+            SELECT * FROM sharded
+            """,
+            {
+                "product_ids": product_ids,
+                "quantities": [quantities[product_id] for product_id in product_ids],
+                "now": datetime.utcnow()
+            }
+        )
+        products = fetch_all(cur, Product)
+        cur.close()
+        return sorted(products, key=lambda product: product.id)
 
     def list_all(self) -> List[Product]:
         cur = self.connection.cursor()
-        cur.execute("SELECT * FROM products")
+        cur.execute(f"SELECT {PRODUCT_COLUMNS} FROM product_inventory")
+        products = fetch_all(cur, Product)
+        cur.close()
+        return products
+
+    def iter_all(self, itersize: Optional[int] = None) -> Iterator[Product]:
+        cur = self.connection.named_cursor(itersize)
+        try:
+            cur.execute(f"SELECT {PRODUCT_COLUMNS} FROM product_inventory ORDER BY id")
+            yield from iter_rows(cur, Product)
+        finally:
+            cur.close()
+
+    def list_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Product]:
+        cur = self.connection.cursor()
+        cur.execute(
+            f"SELECT {PRODUCT_COLUMNS} FROM product_inventory WHERE id > %s ORDER BY id LIMIT %s", (after_id or 0, limit)
+        )
+        products = fetch_all(cur, Product)
+        cur.close()
+        return products
+
+    def search(
+        self, query: str, catalog_id: Optional[int] = None, limit: int = 50, after: Optional[Tuple[float, int]] = None
+    ) -> List[ProductSearchResult]:
+        tsquery = to_prefix_tsquery(query)
+        if not tsquery:
+            return []
+        params = {"tsquery": tsquery, "text": query, "catalog_id": catalog_id, "limit": limit}
+        catalog_filter = "AND p.product_catalog_id = %(catalog_id)s" if catalog_id is not None else ""
+        keyset_filter = ""
+        if after is not None:
+            params["after_rank"], params["after_id"] = after
+            keyset_filter = "WHERE (rank, id) < (%(after_rank)s, %(after_id)s)"
+
+        cur = self.connection.cursor()
+        cur.execute(
+            f"""
+            SELECT * FROM (
+                SELECT {P_PRODUCT_COLUMNS},
+                    (ts_rank(p.search_vector, q.query) + similarity(p.name, %(text)s))::float8 AS rank
+                FROM product_inventory p, to_tsquery('simple', %(tsquery)s) AS q(query)
+                WHERE p.is_active
+                  AND (p.search_vector @@ q.query OR p.name %% %(text)s)
+                  {catalog_filter}
+            ) hits
+            {keyset_filter}
+            ORDER BY rank DESC, id DESC
+            LIMIT %(limit)s
+            """,
+            params
+        )
         rows = cur.fetchall()
+        mapper = row_mapper(Product, cur.description) if rows else None
         cur.close()
-        return [Product(**row) for row in rows]
+        # rank is the last column; the mapper picks the product columns by position and ignores it.
+        return [ProductSearchResult(mapper(row), row[-1]) for row in rows]
 
 
+@instrumented("customers")
 class PostgresCustomerRepository(CustomerRepository):
     def __init__(self, connection: PostgresConnection):
         self.connection = connection
@@ -73,18 +494,31 @@ class PostgresCustomerRepository(CustomerRepository):
     def get_by_id(self, customer_id: int) -> Optional[Customer]:
         cur = self.connection.cursor()
         cur.execute("SELECT * FROM customers WHERE id = %s", (customer_id,))
-        row = cur.fetchone()
+        customer = fetch_one(cur, Customer)
         cur.close()
-        if row:
-            return Customer(**row)
-        return None
+        return customer
 
     def list_all(self) -> List[Customer]:
         cur = self.connection.cursor()
         cur.execute("SELECT * FROM customers")
-        rows = cur.fetchall()
+        customers = fetch_all(cur, Customer)
         cur.close()
-        return [Customer(**row) for row in rows]
+        return customers
+
+    def iter_all(self, itersize: Optional[int] = None) -> Iterator[Customer]:
+        cur = self.connection.named_cursor(itersize)
+        try:
+            cur.execute("SELECT * FROM customers ORDER BY id")
+            yield from iter_rows(cur, Customer)
+        finally:
+            cur.close()
+
+    def list_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Customer]:
+        cur = self.connection.cursor()
+        cur.execute("SELECT * FROM customers WHERE id > %s ORDER BY id LIMIT %s", (after_id or 0, limit))
+        customers = fetch_all(cur, Customer)
+        cur.close()
+        return customers
 
     def add(self, customer: Customer) -> Customer:
         cur = self.connection.cursor()
@@ -100,10 +534,9 @@ class PostgresCustomerRepository(CustomerRepository):
                 customer.updated_at, customer.is_active
             )
         )
-        row = cur.fetchone()
-        self.connection.commit()
+        customer = fetch_one(cur, Customer)
         cur.close()
-        return Customer(**row)
+        return customer
 
     def update(self, customer: Customer) -> None:
         cur = self.connection.cursor()
@@ -118,22 +551,22 @@ class PostgresCustomerRepository(CustomerRepository):
                 customer.phone, customer.tax_id, datetime.utcnow(), customer.is_active, customer.id
             )
         )
-        self.connection.commit()
         cur.close()
 
 
+@instrumented("orders")
 class PostgresOrderRepository(OrderRepository):
     def __init__(self, connection: PostgresConnection):
         self.connection = connection
 
-    def get_by_id(self, order_id: int) -> Optional[Order]:
+    def get_by_id(self, order_id: int, for_update: bool = False) -> Optional[Order]:
         cur = self.connection.cursor()
-        cur.execute("SELECT * FROM orders WHERE id = %s", (order_id,))
-        row = cur.fetchone()
+        # Writers lock the order before its lines, the same order the status and totals triggers use.
+        lock = " FOR NO KEY UPDATE" if for_update else ""
+        cur.execute(f"SELECT * FROM orders WHERE id = %s{lock}", (order_id,))
+        order = fetch_one(cur, Order)
         cur.close()
-        if row:
-            return Order(**row)
-        return None
+        return order
 
     def add(self, order: Order) -> Order:
         cur = self.connection.cursor()
@@ -147,10 +580,9 @@ class PostgresOrderRepository(OrderRepository):
                 order.notes, order.created_at, order.updated_at
             )
         )
-        row = cur.fetchone()
-        self.connection.commit()
+        order = fetch_one(cur, Order)
         cur.close()
-        return Order(**row)
+        return order
 
     def update(self, order: Order) -> None:
         cur = self.connection.cursor()
@@ -165,17 +597,113 @@ class PostgresOrderRepository(OrderRepository):
                 order.delivery_address, order.notes, datetime.utcnow(), order.id
             )
         )
-        self.connection.commit()
         cur.close()
 
     def list_all(self) -> List[Order]:
         cur = self.connection.cursor()
         cur.execute("SELECT * FROM orders")
-        rows = cur.fetchall()
+        orders = fetch_all(cur, Order)
+        cur.close()
+        return orders
+
+    def iter_all(self, itersize: Optional[int] = None) -> Iterator[Order]:
+        cur = self.connection.named_cursor(itersize)
+        try:
+            cur.execute("SELECT * FROM orders ORDER BY id")
+            yield from iter_rows(cur, Order)
+        finally:
+            cur.close()
+
+    def iter_with_items(
+        self,
+        statuses: Optional[List[str]] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        itersize: Optional[int] = None
+    ) -> Iterator[Tuple[Order, List[OrderItem]]]:
+        conditions = []
+        if statuses:
+            conditions.append("o.status = ANY(%(statuses)s)")
+        if date_from:
+            conditions.append("o.order_date >= %(date_from)s")
+        if date_to:
+            conditions.append("o.order_date < %(date_to)s")
+        cur = self.connection.named_cursor(itersize)
+        try:
+            # Ordering by (order_id, product_id) follows the unique index on order_items, so the join
+            # streams without a sort and each order's rows arrive together.
+            cur.execute(
+                f"""
+                SELECT {O_ORDER_COLUMNS}, {I_ORDER_ITEM_COLUMNS}
+                FROM orders o
+                LEFT JOIN order_items i ON i.order_id = o.id
+                {"WHERE " + " AND ".join(conditions) if conditions else ""}
+                ORDER BY o.id, i.product_id
+                """,
+                {"statuses": statuses, "date_from": date_from, "date_to": date_to}
+            )
+            split = len(ORDER_FIELDS)
+            order_mapper = item_mapper = None
+            order, items = None, []
+            for row in cur:
+                if order_mapper is None:
+                    order_mapper = row_mapper(Order, cur.description[:split])
+                    item_mapper = row_mapper(OrderItem, cur.description[split:])
+                if order is None or row[0] != order.id:
+                    if order is not None:
+                        yield order, items
+                    order, items = order_mapper(row[:split]), []
+                if row[split] is not None:
+                    items.append(item_mapper(row[split:]))
+            if order is not None:
+                yield order, items
+        finally:
+            cur.close()
+
+    def list_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Order]:
+        cur = self.connection.cursor()
+        cur.execute("SELECT * FROM orders WHERE id > %s ORDER BY id LIMIT %s", (after_id or 0, limit))
+        orders = fetch_all(cur, Order)
         cur.close()
-        return [Order(**row) for row in rows]
+        return orders
 
+    def list_by_customer(
+        self,
+        customer_id: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 50,
+        statuses: Optional[List[str]] = None
+    ) -> List[Order]:
+        # Newest first, keyset-paged on (order_date, id): walks orders_customer_order_date_idx (migration 013)
+        # from the cursor without a sort, however many orders the customer has. item_count and total_amount
+        # are columns kept by triggers, so there is no per-order item query.
+        conditions = ["customer_id = %(customer_id)s"]
+        if statuses:
+            conditions.append("status = ANY(%(statuses)s)")
+        if after:
+            conditions.append("(order_date, id) < (%(after_date)s, %(after_id)s)")
+        cur = self.connection.cursor()
+        cur.execute(
+            f"""
+            SELECT * FROM orders
+            WHERE {" AND ".join(conditions)}
+            ORDER BY order_date DESC, id DESC
+            LIMIT %(limit)s
+            """,
+            {
+                "customer_id": customer_id,
+                "statuses": statuses,
+                "after_date": after[0] if after else None,
+                "after_id": after[1] if after else None,
+                "limit": limit
+            }
+        )
+        orders = fetch_all(cur, Order)
+        cur.close()
+        return orders
 
+
+@instrumented("order_items")
 class PostgresOrderItemRepository(OrderItemRepository):
     def __init__(self, connection: PostgresConnection):
         self.connection = connection
@@ -183,9 +711,9 @@ class PostgresOrderItemRepository(OrderItemRepository):
     def list_by_order(self, order_id: int) -> List[OrderItem]:
         cur = self.connection.cursor()
         cur.execute("SELECT * FROM order_items WHERE order_id = %s", (order_id,))
-        rows = cur.fetchall()
+        order_items = fetch_all(cur, OrderItem)
         cur.close()
-        return [OrderItem(**row) for row in rows]
+        return order_items
 
     def get_by_order_and_product(self, order_id: int, product_id: int) -> Optional[OrderItem]:
         cur = self.connection.cursor()
@@ -193,28 +721,89 @@ class PostgresOrderItemRepository(OrderItemRepository):
             "SELECT * FROM order_items WHERE order_id = %s AND product_id = %s",
             (order_id, product_id)
         )
-        row = cur.fetchone()
+        order_item = fetch_one(cur, OrderItem)
         cur.close()
-        if row:
-            return OrderItem(**row)
-        return None
+        return order_item
 
     def add(self, order_item: OrderItem) -> OrderItem:
         cur = self.connection.cursor()
         cur.execute(
             """
-            INSERT INTO order_items (order_id, product_id, product_name, unit_price, quantity, created_at, is_active)
-            VALUES (%s,%s,%s,%s,%s,%s,%s) RETURNING *
+            INSERT INTO order_items (
+                order_id, product_id, product_name, unit_price, quantity, created_at, is_active,
+                reserved_quantity, reserved_until
+            )
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s) RETURNING *
             """,
             (
                 order_item.order_id, order_item.product_id, order_item.product_name,
-                order_item.unit_price, order_item.quantity, order_item.created_at, order_item.is_active
+                order_item.unit_price, order_item.quantity, order_item.created_at, order_item.is_active,
+                order_item.reserved_quantity, order_item.reserved_until
             )
         )
-        row = cur.fetchone()
-        self.connection.commit()
+        order_item = fetch_one(cur, OrderItem)
+        cur.close()
+        return order_item
+
+    def upsert(self, order_item: OrderItem) -> OrderItem:
+        cur = self.connection.cursor()
+        cur.execute(
+            """
+            INSERT INTO order_items (
+                order_id, product_id, product_name, unit_price, quantity, created_at, is_active,
+                reserved_quantity, reserved_until
+            )
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+            ON CONFLICT (order_id, product_id)
+            DO UPDATE SET
+                quantity = order_items.quantity + EXCLUDED.quantity,
+                reserved_quantity = order_items.reserved_quantity + EXCLUDED.reserved_quantity,
+                reserved_until = EXCLUDED.reserved_until
+            RETURNING *
+            """,
+            (
+                order_item.order_id, order_item.product_id, order_item.product_name,
+                order_item.unit_price, order_item.quantity, order_item.created_at, order_item.is_active,
+                order_item.reserved_quantity, order_item.reserved_until
+            )
+        )
+        order_item = fetch_one(cur, OrderItem)
+        cur.close()
+        return order_item
+
+    def add_many(self, order_items: List[OrderItem]) -> List[OrderItem]:
+        if not order_items:
+            return []
+        cur = self.connection.cursor()
+        rows = execute_values(
+            cur,
+            """
+            INSERT INTO order_items (
+                order_id, product_id, product_name, unit_price, quantity, created_at, is_active,
+                reserved_quantity, reserved_until
+            )
+            VALUES %s
+            ON CONFLICT (order_id, product_id)
+            DO UPDATE SET
+                quantity = order_items.quantity + EXCLUDED.quantity,
+                reserved_quantity = order_items.reserved_quantity + EXCLUDED.reserved_quantity,
+                reserved_until = EXCLUDED.reserved_until
+            RETURNING *
+            """,
+            [
+                (
+                    item.order_id, item.product_id, item.product_name,
+                    item.unit_price, item.quantity, item.created_at, item.is_active,
+                    item.reserved_quantity, item.reserved_until
+                )
+                for item in order_items
+            ],
+            page_size=len(order_items),
+            fetch=True
+        )
+        order_items = map_rows(cur, rows, OrderItem)
         cur.close()
-        return OrderItem(**row)
+        return sorted(order_items, key=lambda item: item.product_id)
 
     def update(self, order_item: OrderItem) -> None:
         cur = self.connection.cursor()
@@ -226,5 +815,4 @@ class PostgresOrderItemRepository(OrderItemRepository):
             """,
             (order_item.quantity, order_item.is_active, order_item.id)
         )
-        self.connection.commit()
         cur.close()
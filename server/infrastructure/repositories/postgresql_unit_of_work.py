@@ -0,0 +1,83 @@
+from typing import Optional
+import psycopg2
+from domain.unit_of_work import UnitOfWork
+from infrastructure.repositories.cached_repositories import ProductCache, AvailabilityCachedProductRepository
+from infrastructure.repositories.postgresql_repositories import (
+    PostgresConnection,
+    PostgresConnectionPool,
+    PoolTimeoutError,
+    PostgresCatalogRepository,
+    PostgresProductRepository,
+    PostgresCustomerRepository,
+    PostgresOrderRepository,
+    PostgresOrderItemRepository
+)
+from infrastructure.repositories.replica_router import ReplicaRouter
+
+
+class PostgresUnitOfWork(UnitOfWork):
+    def __init__(self, pool: PostgresConnectionPool):
+        self.pool = pool
+        self.connection: Optional[PostgresConnection] = None
+
+    def __enter__(self) -> "PostgresUnitOfWork":
+        self.connection = self.pool.getconn()
+        self.catalogs = PostgresCatalogRepository(self.connection)
+        self.products = PostgresProductRepository(self.connection)
+        self.customers = PostgresCustomerRepository(self.connection)
+        self.orders = PostgresOrderRepository(self.connection)
+        self.order_items = PostgresOrderItemRepository(self.connection)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            super().__exit__(exc_type, exc_value, traceback)
+        finally:
+            self.pool.putconn(self.connection)
+            self.connection = None
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def rollback(self) -> None:
+        if not self.connection.closed:
+            self.connection.rollback()
+
+
+class ReadOnlyPostgresUnitOfWork(PostgresUnitOfWork):
+    """A unit of work for pure reads, run on a replica the router picks (the primary as a fallback).
+
+    Its transaction is READ ONLY, so a write fails even when it lands on the primary. The optional
+    availability cache is short-TTL, which bounds staleness by itself. Anything that needs read-your-writes
+    belongs in a PostgresUnitOfWork instead.
+    """
+
+    def __init__(self, router: ReplicaRouter, availability_cache: Optional[ProductCache] = None):
+        super().__init__(router.primary)
+        self.router = router
+        self.availability_cache = availability_cache
+
+    def __enter__(self) -> "ReadOnlyPostgresUnitOfWork":
+        self.pool = self.router.read_pool()
+        try:
+            super().__enter__()
+        except (psycopg2.Error, PoolTimeoutError):
+            # A replica that went away since its last lag check (or has no free connection) must not
+            # fail the read: skip it until the next check and retry once on the primary.
+            if self.pool is self.router.primary:
+                raise
+            self.pool = self.router.replica_failed(self.pool)
+            super().__enter__()
+        if self.availability_cache is not None:
+            self.products = AvailabilityCachedProductRepository(self.products, self.availability_cache)
+        # psycopg2 then opens the transaction with BEGIN READ ONLY: no extra round trip.
+        self.connection.conn.readonly = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            self.rollback()
+            if not self.connection.closed:
+                self.connection.conn.readonly = None
+        finally:
+            super().__exit__(exc_type, exc_value, traceback)
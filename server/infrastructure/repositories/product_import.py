@@ -0,0 +1,203 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import IO, Iterator, List
+import psycopg2
+from domain.models import ProductImportResult
+from infrastructure.config import Config
+from infrastructure.metrics import instrumented
+from infrastructure.repositories.postgresql_repositories import PostgresConnection
+
+# Feed columns and their staging types. sku is the merge key; reserved is never taken from a feed.
+FEED_COLUMNS = {
+    "sku": "VARCHAR(64) NOT NULL",
+    "name": "VARCHAR(255)",
+    "description": "TEXT",
+    "price": "DECIMAL(12,2)",
+    "stock": "INT",
+    "product_catalog_id": "INT",
+    "is_active": "BOOLEAN",
+}
+# Unknown SKUs can only become new products when the feed carries the NOT NULL columns;
+# otherwise (e.g. a price and stock feed) the import only updates existing products.
+INSERT_COLUMNS = ("name", "price")
+FEED_FORMATS = ("csv", "ndjson")
+COPY_CHUNK_ROWS = 10000
+COPY_BUFFER_SIZE = 1 << 20
+
+
+class ProductFeedError(Exception): pass
+
+
+def feed_columns(columns: List[str]) -> List[str]:
+    unknown = [column for column in columns if column not in FEED_COLUMNS]
+    if unknown:
+        raise ProductFeedError(f"Unknown feed columns: {', '.join(unknown)}")
+    if len(set(columns)) != len(columns):
+        raise ProductFeedError("Feed columns must be unique")
+    if "sku" not in columns or len(columns) < 2:
+        raise ProductFeedError("Feed must have a sku column and at least one product column")
+    return columns
+
+
+def _ndjson_rows(stream: IO, columns: List[str], first: dict) -> Iterator[tuple]:
+    yield tuple(first[column] for column in columns)
+    for line_number, line in enumerate(stream, start=2):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise ProductFeedError(f"Line {line_number}: invalid JSON")
+        if not isinstance(record, dict) or record.keys() != first.keys():
+            raise ProductFeedError(f"Line {line_number}: expected an object with keys {', '.join(columns)}")
+        yield tuple(record[column] for column in columns)
+
+
+def _merge_sql(columns: List[str], upsert: bool) -> str:
+    # UPDATE joined on sku plus an anti-join INSERT instead of INSERT .. ON CONFLICT DO UPDATE:
+    # ON CONFLICT locks and dirties every existing row even when its WHERE rejects the update,
+    # while the join touches only rows that actually change.
+    values = [column for column in columns if column != "sku"]
+    if upsert:
+        inserted = f"""
+            , inserted AS (
+                INSERT INTO products (sku, {', '.join(values)})
+                SELECT sku, {', '.join(values)} FROM feed f
+                WHERE NOT EXISTS (SELECT 1 FROM products p WHERE p.sku = f.sku)
+                ON CONFLICT (sku) DO NOTHING
+                RETURNING id
+            )
+        """
+        counts = "(SELECT count(*) FROM inserted)::int, (SELECT count(*) FROM updated)::int, 0"
+    else:
+        inserted = ""
+        counts = """
+            0, (SELECT count(*) FROM updated)::int,
+            (SELECT count(*) FROM feed f WHERE NOT EXISTS (SELECT 1 FROM products p WHERE p.sku = f.sku))::int
+        """
+    return f"""
+        WITH feed AS (
+            SELECT DISTINCT ON (sku) sku, {', '.join(values)}
+            FROM product_feed
+            ORDER BY sku, line DESC
+        ), updated AS (
+            UPDATE products p
+            SET {', '.join(f'{column} = f.{column}' for column in values)}, updated_at = %(now)s
+            FROM feed f
+            WHERE p.sku = f.sku
+              AND ({', '.join(f'p.{column}' for column in values)})
+                IS DISTINCT FROM ({', '.join(f'f.{column}' for column in values)})
+            RETURNING p.id, p.stock_shards
+        ){inserted}
+        SELECT
+            (SELECT count(*) FROM product_feed)::int,
+            (SELECT count(*) FROM feed)::int,
+            {counts},
+            coalesce((SELECT array_agg(id) FROM updated WHERE stock_shards > 1), '{{}}')
+    """
+
+
+@instrumented("product_import")
+class PostgresProductImporter:
+    """Stages a supplier feed with COPY and merges it into products in one statement.
+
+    Runs in the caller's transaction: commit after import_feed returns, roll back on ProductFeedError.
+    """
+
+    def __init__(self, connection: PostgresConnection):
+        self.connection = connection
+
+    def import_feed(self, stream: IO, feed_format: str) -> ProductImportResult:
+        if feed_format not in FEED_FORMATS:
+            raise ProductFeedError(f"format must be one of {', '.join(FEED_FORMATS)}")
+        cur = self.connection.cursor()
+        try:
+            # The merge sorts and hashes the whole feed; keep that in memory for this transaction only.
+            cur.execute("SELECT set_config('work_mem', %s, true)", (Config.PRODUCT_IMPORT_WORK_MEM,))
+            columns = self._stage_csv(cur, stream) if feed_format == "csv" else self._stage_ndjson(cur, stream)
+            cur.execute("ANALYZE product_feed")
+            upsert = all(column in columns for column in INSERT_COLUMNS)
+            cur.execute(_merge_sql(columns, upsert), {"now": datetime.utcnow()})
+            received, distinct, inserted, updated, unknown, sharded = cur.fetchone()
+            if sharded and "stock" in columns:
+                # Sharded products keep stock in product_stock_shards: spread the new total there.
+                cur.execute(
+                    """
+                    SELECT reshard_product_stock(id, stock_shards, stock)
+                    FROM products WHERE id = ANY(%s) ORDER BY id
+                    """,
+                    (sharded,)
+                )
+        except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+            detail = e.diag.message_primary or str(e)
+            if e.diag.context:
+                detail = f"{detail} ({e.diag.context.splitlines()[0]})"
+            raise ProductFeedError(detail)
+        finally:
+            cur.close()
+        return ProductImportResult(
+            received=received,
+            duplicates=received - distinct,
+            inserted=inserted,
+            updated=updated,
+            unchanged=distinct - inserted - updated - unknown,
+            unknown=unknown
+        )
+
+    def _create_staging(self, cur, columns: List[str]) -> None:
+        cur.execute(
+            f"""
+            CREATE TEMP TABLE product_feed (
+                line BIGSERIAL,
+                {', '.join(f'{column} {FEED_COLUMNS[column]}' for column in columns)}
+            ) ON COMMIT DROP
+            """
+        )
+
+    def _stage_csv(self, cur, stream: IO) -> List[str]:
+        header = stream.readline()
+        if isinstance(header, bytes):
+            header = header.decode("utf-8-sig")
+        columns = feed_columns([column.strip() for column in next(csv.reader([header]), [])])
+        self._create_staging(cur, columns)
+        # The rest of the stream goes to the server as is; COPY parses and type-checks it.
+        cur.copy_expert(
+            f"COPY product_feed ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", stream, size=COPY_BUFFER_SIZE
+        )
+        return columns
+
+    def _stage_ndjson(self, cur, stream: IO) -> List[str]:
+        first = None
+        for line in stream:
+            if line.strip():
+                try:
+                    first = json.loads(line)
+                except ValueError:
+                    raise ProductFeedError("Line 1: invalid JSON")
+                break
+        if not isinstance(first, dict):
+            raise ProductFeedError("Feed must start with a JSON object")
+        columns = feed_columns([column for column in FEED_COLUMNS if column in first] + [
+            column for column in first if column not in FEED_COLUMNS
+        ])
+        self._create_staging(cur, columns)
+
+        sql = f"COPY product_feed ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        pending = 0
+        for row in _ndjson_rows(stream, columns, first):
+            writer.writerow(row)
+            pending += 1
+            if pending >= COPY_CHUNK_ROWS:
+                buffer.seek(0)
+                cur.copy_expert(sql, buffer)
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        if pending:
+            buffer.seek(0)
+            cur.copy_expert(sql, buffer)
+        return columns
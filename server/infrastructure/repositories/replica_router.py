@@ -0,0 +1,147 @@
+import logging
+import math
+import threading
+import time
+from itertools import count
+from typing import List, Optional
+import psycopg2
+from infrastructure.config import Config
+from infrastructure.metrics import REPLICA_LAG, REPLICA_FALLBACKS
+from infrastructure.repositories.postgresql_repositories import PostgresConnection, PostgresConnectionPool
+
+logger = logging.getLogger(__name__)
+
+ROUTING_STRATEGIES = ("round_robin", "least_connections")
+# Seconds since the last replayed transaction, or 0 when the replica has replayed everything it received
+# (an idle primary writes no transactions, so the replay timestamp alone would report growing lag).
+# That shortcut only holds while WAL is streaming: a replica whose receiver is gone has replayed all it
+# got and still falls further behind, so it reports NULL (not eligible) instead. pg_stat_wal_receiver
+# has no row without a receiver; its status is hidden from roles without pg_read_all_stats.
+# A server that is not in recovery is a stand-in replica and has no lag by definition.
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver WHERE coalesce(status, 'streaming') = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+class Replica:
+    def __init__(self, name: str, pool: PostgresConnectionPool, probe_timeout: float = Config.REPLICA_PROBE_TIMEOUT):
+        self.name = name
+        self.pool = pool
+        self.probe_timeout = probe_timeout
+        # None until the first check succeeds, and again whenever the replica cannot be reached.
+        self.lag: Optional[float] = None
+        self.checked_at = float("-inf")
+        self._probe: Optional[PostgresConnection] = None
+        self._checking = threading.Lock()
+
+    def refresh_lag(self, interval: float) -> None:
+        # One thread checks while the others keep routing on the previous value.
+        if time.monotonic() - self.checked_at < interval or not self._checking.acquire(blocking=False):
+            return
+        try:
+            # A dedicated connection: probing through the pool could wait behind requests for a slot.
+            # The check runs inside a request, so a replica that stops answering must fail it quickly:
+            # connect_timeout bounds the connect, statement_timeout a slow server, and tcp_user_timeout
+            # a query sent into a network that silently drops it.
+            if self._probe is None or self._probe.closed:
+                self._probe = PostgresConnection(
+                    self.pool.dsn,
+                    connect_timeout=math.ceil(self.probe_timeout),
+                    options=f"-c statement_timeout={int(self.probe_timeout * 1000)}",
+                    tcp_user_timeout=int(self.probe_timeout * 1000)
+                )
+                self._probe.conn.autocommit = True
+            cur = self._probe.cursor()
+            cur.execute(LAG_SQL)
+            lag = cur.fetchone()[0]
+            cur.close()
+            self.lag = None if lag is None else float(lag)
+        except psycopg2.Error:
+            logger.warning("Replica %s is unreachable, reading from the other servers", self.name, exc_info=True)
+            if self._probe is not None:
+                self._probe.close()
+                self._probe = None
+            self.lag = None
+        finally:
+            self.checked_at = time.monotonic()
+            REPLICA_LAG.labels(self.name).set(-1 if self.lag is None else self.lag)
+            self._checking.release()
+
+    def mark_unavailable(self) -> None:
+        # Out of rotation until the next lag check says otherwise.
+        self.lag = None
+        self.checked_at = time.monotonic()
+        REPLICA_LAG.labels(self.name).set(-1)
+
+
+class ReplicaRouter:
+    """Chooses the pool for a read-only unit of work.
+
+    Replicas whose last measured lag is within max_lag share the reads by round robin or by the fewest
+    connections in use; with none eligible (or none configured) the read goes to the primary.
+    """
+
+    def __init__(
+        self,
+        primary: PostgresConnectionPool,
+        replicas: List[PostgresConnectionPool],
+        strategy: str = Config.REPLICA_ROUTING,
+        max_lag: float = Config.REPLICA_MAX_LAG,
+        lag_check_interval: float = Config.REPLICA_LAG_CHECK_INTERVAL,
+        probe_timeout: float = Config.REPLICA_PROBE_TIMEOUT
+    ):
+        if strategy not in ROUTING_STRATEGIES:
+            raise ValueError(f"Unknown replica routing {strategy!r}, expected one of {', '.join(ROUTING_STRATEGIES)}")
+        self.primary = primary
+        self.replicas = [
+            Replica(f"replica{index}", pool, probe_timeout) for index, pool in enumerate(replicas, start=1)
+        ]
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self._turns = count()
+
+    def read_pool(self) -> PostgresConnectionPool:
+        if not self.replicas:
+            return self.primary
+        eligible = []
+        for replica in self.replicas:
+            replica.refresh_lag(self.lag_check_interval)
+            if replica.lag is not None and replica.lag <= self.max_lag:
+                eligible.append(replica)
+        if not eligible:
+            REPLICA_FALLBACKS.inc()
+            return self.primary
+        if self.strategy == "least_connections":
+            return min(eligible, key=lambda replica: replica.pool.in_use).pool
+        return eligible[next(self._turns) % len(eligible)].pool
+
+    def replica_failed(self, pool: PostgresConnectionPool) -> PostgresConnectionPool:
+        """Take the replica behind pool out of rotation after a failed checkout; returns the primary to retry on."""
+        for replica in self.replicas:
+            if replica.pool is pool:
+                logger.warning("Replica %s failed a checkout, reading from the primary", replica.name, exc_info=True)
+                replica.mark_unavailable()
+        REPLICA_FALLBACKS.inc()
+        return self.primary
+
+    def stats(self) -> dict:
+        return {
+            "strategy": self.strategy,
+            "max_lag": self.max_lag,
+            "replicas": {
+                replica.name: {
+                    "lag": replica.lag,
+                    "eligible": replica.lag is not None and replica.lag <= self.max_lag,
+                    "pool": replica.pool.stats()
+                }
+                for replica in self.replicas
+            }
+        }
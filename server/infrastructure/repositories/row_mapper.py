@@ -0,0 +1,54 @@
+from dataclasses import fields
+from operator import itemgetter
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+_mappers: Dict[Tuple[type, Tuple[str, ...]], Callable] = {}
+
+
+def _compile(model: Type[T], columns: Tuple[str, ...]) -> Callable[[tuple], T]:
+    missing = [field.name for field in fields(model) if field.name not in columns]
+    if missing:
+        raise ValueError(f"Result columns {columns} do not cover {model.__name__} fields {missing}")
+    positions = [columns.index(field.name) for field in fields(model)]
+    if positions == list(range(len(columns))):
+        return lambda row: model(*row)
+    getter = itemgetter(*positions)
+    return lambda row: model(*getter(row))
+
+
+def row_mapper(model: Type[T], description) -> Callable[[tuple], T]:
+    """Return a function building `model` from a tuple row, compiled once per model and column list."""
+    columns = tuple(column.name for column in description)
+    mapper = _mappers.get((model, columns))
+    if mapper is None:
+        mapper = _mappers[(model, columns)] = _compile(model, columns)
+    return mapper
+
+
+def fetch_one(cur, model: Type[T]) -> Optional[T]:
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return row_mapper(model, cur.description)(row)
+
+
+def fetch_all(cur, model: Type[T]) -> List[T]:
+    return map_rows(cur, cur.fetchall(), model)
+
+
+def map_rows(cur, rows: List[tuple], model: Type[T]) -> List[T]:
+    if not rows:
+        return []
+    mapper = row_mapper(model, cur.description)
+    return [mapper(row) for row in rows]
+
+
+def iter_rows(cur, model: Type[T]) -> Iterator[T]:
+    # Named cursors only have a description once the first batch is fetched.
+    mapper = None
+    for row in cur:
+        if mapper is None:
+            mapper = row_mapper(model, cur.description)
+        yield mapper(row)
@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(ROOT_DIR)
+
+from api.exports import EXPORT_FORMATS, export_orders
+from api.validation import ORDER_STATUSES
+from infrastructure.repositories.postgresql_repositories import PostgresConnection, PostgresOrderRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream all orders with their items as NDJSON or CSV")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--status", action="append", choices=ORDER_STATUSES, help="repeat for several statuses")
+    parser.add_argument("--from", dest="date_from", type=datetime.fromisoformat, help="order_date lower bound")
+    parser.add_argument("--to", dest="date_to", type=datetime.fromisoformat, help="order_date upper bound, exclusive")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--output", default="-", help="file to write, - for stdout")
+    args = parser.parse_args()
+
+    connection = PostgresConnection()
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    exported = 0
+
+    def counted(orders):
+        nonlocal exported
+        for order in orders:
+            exported += 1
+            yield order
+
+    started = time.perf_counter()
+    try:
+        orders = PostgresOrderRepository(connection).iter_with_items(args.status, args.date_from, args.date_to)
+        for chunk in export_orders(counted(orders), args.format, args.gzip):
+            output.write(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+        connection.rollback()
+        connection.close()
+    print(f"Exported {exported} order(s) in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import gzip
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(ROOT_DIR)
+
+from infrastructure.repositories.postgresql_repositories import PostgresConnection
+from infrastructure.repositories.product_import import PostgresProductImporter, ProductFeedError
+
+EXTENSION_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+def _open_feed(path: str):
+    if path == "-":
+        return sys.stdin.buffer
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _guess_format(path: str) -> str:
+    name = path[:-3] if path.endswith(".gz") else path
+    return EXTENSION_FORMATS.get(os.path.splitext(name)[1], "csv")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge a supplier product feed (CSV or NDJSON, keyed by sku)")
+    parser.add_argument("path", help="feed file, optionally .gz; - reads stdin")
+    parser.add_argument("--format", choices=sorted(set(EXTENSION_FORMATS.values())))
+    parser.add_argument("--dry-run", action="store_true", help="report the counts and roll back")
+    args = parser.parse_args()
+
+    connection = PostgresConnection()
+    stream = _open_feed(args.path)
+    started = time.perf_counter()
+    try:
+        result = PostgresProductImporter(connection).import_feed(stream, args.format or _guess_format(args.path))
+        if args.dry_run:
+            connection.rollback()
+        else:
+            connection.commit()
+    except ProductFeedError as e:
+        connection.rollback()
+        print(f"Feed rejected: {e}")
+        sys.exit(1)
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+        connection.close()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"{result.received} row(s) in {elapsed:.2f}s ({result.received / elapsed if elapsed else 0:.0f} rows/s): "
+        f"{result.inserted} inserted, {result.updated} updated, {result.unchanged} unchanged, "
+        f"{result.unknown} unknown sku(s), {result.duplicates} duplicate row(s)"
+        + (" [dry run]" if args.dry_run else "")
+    )
+
+
+if __name__ == "__main__":
+    main()
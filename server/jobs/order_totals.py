@@ -0,0 +1,121 @@
+import argparse
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(ROOT_DIR)
+
+from infrastructure.repositories.postgresql_repositories import PostgresConnection
+
+# Recomputes the aggregates that the order_items totals triggers maintain (migration 008)
+# for one id range of orders.
+TOTALS_SQL = """
+    SELECT o.id,
+        o.item_count, o.total_amount,
+        count(i.id)::int AS expected_item_count,
+        coalesce(sum(i.unit_price * i.quantity), 0) AS expected_total_amount,
+        max(i.created_at) AS last_item_created_at
+    FROM orders o
+    LEFT JOIN order_items i ON i.order_id = o.id AND i.is_active
+    WHERE o.id >= %(start)s AND o.id < %(stop)s
+    GROUP BY o.id
+"""
+
+
+def _id_range(connection: PostgresConnection):
+    cur = connection.conn.cursor()
+    cur.execute("SELECT min(id), max(id) FROM orders")
+    first, last = cur.fetchone()
+    cur.close()
+    connection.rollback()
+    return first, last
+
+
+def _batches(first: int, last: int, batch_size: int):
+    for start in range(first, last + 1, batch_size):
+        yield {"start": start, "stop": start + batch_size}
+
+
+def verify(batch_size: int = 10000, sample: int = 20) -> list:
+    connection = PostgresConnection()
+    mismatches = []
+    try:
+        first, last = _id_range(connection)
+        if first is None:
+            return mismatches
+        cur = connection.conn.cursor()
+        for batch in _batches(first, last, batch_size):
+            cur.execute(
+                f"""
+                SELECT * FROM ({TOTALS_SQL}) t
+                WHERE (item_count, total_amount) IS DISTINCT FROM (expected_item_count, expected_total_amount)
+                ORDER BY id
+                """,
+                batch
+            )
+            mismatches.extend(cur.fetchall())
+            connection.rollback()
+        cur.close()
+    finally:
+        connection.close()
+
+    for row in mismatches[:sample]:
+        print(
+            f"order {row[0]}: item_count {row[1]} (expected {row[3]}), total_amount {row[2]} (expected {row[4]})"
+        )
+    return mismatches
+
+
+def backfill(batch_size: int = 10000) -> int:
+    connection = PostgresConnection()
+    fixed = 0
+    try:
+        first, last = _id_range(connection)
+        if first is None:
+            return fixed
+        cur = connection.conn.cursor()
+        for batch in _batches(first, last, batch_size):
+            # Lock the batch first: writers update these rows from the totals trigger,
+            # so they wait for us and we never overwrite a delta that is still in flight.
+            cur.execute(
+                "SELECT 1 FROM orders WHERE id >= %(start)s AND id < %(stop)s ORDER BY id FOR UPDATE", batch
+            )
+            cur.execute(
+                f"""
+                UPDATE orders o
+                SET item_count = t.expected_item_count,
+                    total_amount = t.expected_total_amount,
+                    items_updated_at = coalesce(o.items_updated_at, t.last_item_created_at)
+                FROM ({TOTALS_SQL}) t
+                WHERE o.id = t.id
+                  AND (t.item_count, t.total_amount) IS DISTINCT FROM (t.expected_item_count, t.expected_total_amount)
+                """,
+                batch
+            )
+            fixed += cur.rowcount
+            connection.commit()
+        cur.close()
+    finally:
+        connection.close()
+    return fixed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute and check the maintained order aggregates")
+    parser.add_argument("command", choices=["verify", "backfill"])
+    parser.add_argument("--batch-size", type=int, default=10000, help="orders per transaction (id range)")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        print(f"Backfilled totals for {backfill(args.batch_size)} order(s)")
+        return
+
+    mismatches = verify(args.batch_size)
+    if mismatches:
+        print(f"{len(mismatches)} order(s) have stale totals; run backfill to repair them")
+        sys.exit(1)
+    print("All order totals match their items")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(ROOT_DIR)
+
+import psycopg2
+from prometheus_client import start_http_server
+from infrastructure import metrics
+from infrastructure.config import Config
+from infrastructure.metrics import instrumented
+from infrastructure.repositories.postgresql_repositories import PostgresConnection
+
+# One statement per batch: claim due order lines (skipping lines a request is still writing), zero
+# their reservation and hand the units back. Unsharded products take a single grouped UPDATE;
+# sharded ones go through release_stock() (migration 009) so shard counters stay in range.
+RELEASE_SQL = """
+    WITH due AS (
+        SELECT id, product_id, reserved_quantity
+        FROM order_items
+        WHERE reserved_quantity > 0 AND reserved_until IS NOT NULL AND reserved_until <= %(now)s
+        ORDER BY reserved_until
+        LIMIT %(batch_size)s
+        FOR UPDATE SKIP LOCKED
+    ), released AS (
+        UPDATE order_items i
+        SET reserved_quantity = 0, reservation_released_at = %(now)s
+        FROM due
+        WHERE i.id = due.id
+        RETURNING due.product_id, due.reserved_quantity
+    ), totals AS (
+        SELECT product_id, sum(reserved_quantity)::int AS quantity
+        FROM released
+        WHERE product_id IS NOT NULL
+        GROUP BY product_id
+    ), single AS (
+        UPDATE products p
+        SET reserved = p.reserved - least(p.reserved, t.quantity), updated_at = %(now)s
+        FROM totals t
+        WHERE p.id = t.product_id AND p.stock_shards = 1
+        RETURNING p.id
+    ), sharded AS (
+        SELECT release_stock(p.id, t.quantity) AS released
+        FROM totals t
+        JOIN products p ON p.id = t.product_id AND p.stock_shards > 1
+    )
+    SELECT
+        (SELECT count(*) FROM released)::int,
+        (SELECT coalesce(sum(reserved_quantity), 0) FROM released)::int,
+        (SELECT count(*) FROM single)::int + (SELECT count(*) FROM sharded WHERE released IS NOT NULL)::int
+"""
+
+# Order lines created before migration 010 hold reserved units that reserved_quantity does not record
+# yet (also when the product was added again since). One id range per transaction; rerunning is a no-op.
+# Lines of new orders get a full TTL from the backfill as a grace period (created_at + TTL would release
+# most legacy carts at once); lines of canceled orders are due now, processing/completed ones never.
+BACKFILL_SQL = """
+    UPDATE order_items i
+    SET reserved_quantity = i.quantity,
+        reserved_until = CASE o.status
+            WHEN 'new' THEN coalesce(i.reserved_until, %(now)s + %(ttl)s)
+            WHEN 'canceled' THEN %(now)s
+            ELSE i.reserved_until
+        END
+    FROM orders o
+    WHERE o.id = i.order_id
+      AND i.id >= %(start)s AND i.id < %(stop)s
+      AND i.is_active
+      AND i.reservation_released_at IS NULL
+      AND i.reserved_quantity < i.quantity
+"""
+
+
+@instrumented("reservations")
+class ReservationReleaser:
+    def __init__(self, connection: PostgresConnection, batch_size: int, lock_timeout_ms: int):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.lock_timeout_ms = lock_timeout_ms
+
+    def release_batch(self) -> tuple:
+        """Release up to batch_size due reservations in one transaction; return (lines, units, products)."""
+        cur = self.connection.cursor()
+        try:
+            # A request that holds a product row may be waiting for one of our claimed lines.
+            # Give up well before deadlock_timeout so the request wins and the lines are retried later.
+            cur.execute("SELECT set_config('lock_timeout', %s, true)", (f"{self.lock_timeout_ms}ms",))
+            cur.execute(RELEASE_SQL, {"now": datetime.utcnow(), "batch_size": self.batch_size})
+            lines, units, products = cur.fetchone()
+            self.connection.commit()
+        except psycopg2.errors.LockNotAvailable:
+            self.connection.rollback()
+            metrics.RESERVATION_RELEASE_CONFLICTS.inc()
+            return 0, 0, 0
+        finally:
+            cur.close()
+        metrics.RESERVATIONS_RELEASED.inc(lines)
+        metrics.RESERVED_UNITS_RELEASED.inc(units)
+        return lines, units, products
+
+
+def drain(releaser: ReservationReleaser) -> dict:
+    # Full batches mean more is due; a short one (or a lock timeout) ends the pass.
+    totals = {"lines": 0, "units": 0, "products": 0, "batches": 0}
+    started = time.perf_counter()
+    while True:
+        lines, units, products = releaser.release_batch()
+        totals["batches"] += 1
+        totals["lines"] += lines
+        totals["units"] += units
+        totals["products"] += products
+        if lines < releaser.batch_size:
+            break
+    totals["seconds"] = time.perf_counter() - started
+    return totals
+
+
+def backfill(connection: PostgresConnection, batch_size: int, ttl: float = Config.RESERVATION_TTL) -> int:
+    cur = connection.cursor()
+    try:
+        cur.execute("SELECT min(id), max(id) FROM order_items")
+        first, last = cur.fetchone()
+        connection.rollback()
+        backfilled = 0
+        if first is None:
+            return backfilled
+        for start in range(first, last + 1, batch_size):
+            params = {"start": start, "stop": start + batch_size, "now": datetime.utcnow(), "ttl": timedelta(seconds=ttl)}
+            cur.execute(BACKFILL_SQL, params)
+            backfilled += cur.rowcount
+            connection.commit()
+        return backfilled
+    finally:
+        cur.close()
+
+
+def _report(totals: dict) -> None:
+    rate = totals["lines"] / totals["seconds"] if totals["seconds"] else 0.0
+    print(
+        f"Released {totals['lines']} line(s), {totals['units']} unit(s) of {totals['products']} product(s) "
+        f"in {totals['batches']} batch(es), {totals['seconds']:.2f}s ({rate:.0f} lines/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Release stock reserved by expired order lines and canceled orders")
+    parser.add_argument("--once", action="store_true", help="release everything due now and exit")
+    parser.add_argument(
+        "--backfill", action="store_true", help="record reservations of lines created before migration 010 and exit"
+    )
+    parser.add_argument("--batch-size", type=int, default=Config.RESERVATION_RELEASE_BATCH_SIZE)
+    parser.add_argument(
+        "--interval", type=float, default=Config.RESERVATION_RELEASE_INTERVAL, help="seconds between passes"
+    )
+    parser.add_argument("--lock-timeout-ms", type=int, default=200)
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        start_http_server(args.metrics_port, registry=metrics.REGISTRY)
+
+    connection = PostgresConnection()
+    releaser = ReservationReleaser(connection, args.batch_size, args.lock_timeout_ms)
+    try:
+        if args.backfill:
+            print(f"Backfilled reservations of {backfill(connection, args.batch_size)} order line(s)")
+            return
+        while True:
+            totals = drain(releaser)
+            if args.once or totals["lines"]:
+                _report(totals)
+            if args.once:
+                return
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(ROOT_DIR)
+
+from infrastructure.repositories.postgresql_repositories import PostgresConnection
+
+
+def _top_products(connection: PostgresConnection, n: int) -> list:
+    cur = connection.conn.cursor()
+    cur.execute(
+        """
+        SELECT product_id FROM order_items
+        WHERE product_id IS NOT NULL
+        GROUP BY product_id
+        ORDER BY count(*) DESC, product_id
+        LIMIT %s
+        """,
+        (n,)
+    )
+    product_ids = [row[0] for row in cur.fetchall()]
+    cur.close()
+    return product_ids
+
+
+def set_stock_shards(product_ids: list, shards: int) -> None:
+    connection = PostgresConnection()
+    try:
+        cur = connection.conn.cursor()
+        # One transaction per product keeps the shard locks short on a live system.
+        for product_id in sorted(product_ids):
+            cur.execute("SELECT reshard_product_stock(%s, %s)", (product_id, shards))
+            connection.commit()
+            print(f"Product {product_id}: {shards} stock shard(s)")
+        cur.close()
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spread the stock counters of hot products over several rows")
+    parser.add_argument("product_ids", type=int, nargs="*")
+    parser.add_argument("--top", type=int, help="also reshard the N most ordered products")
+    parser.add_argument("--shards", type=int, required=True, help="1 returns the products to single-row counters")
+    args = parser.parse_args()
+
+    product_ids = set(args.product_ids)
+    if args.top:
+        connection = PostgresConnection()
+        try:
+            product_ids.update(_top_products(connection, args.top))
+        finally:
+            connection.close()
+    if not product_ids:
+        parser.error("pass product ids or --top")
+    set_stock_shards(list(product_ids), args.shards)
+
+
+if __name__ == "__main__":
+    main()
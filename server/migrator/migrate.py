@@ -1,42 +1,178 @@
+import argparse
+import hashlib
 import os
+import re
 import sys
+import time
 import psycopg2
+from psycopg2 import extensions
 ROOT_DIR = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
 sys.path.append(ROOT_DIR)
 
 from infrastructure.config import Config
 MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+# Any constant works as long as nothing else uses it; replicas starting together wait on it in turn.
+MIGRATION_LOCK_ID = 72190413
+# A migration whose first line is this marker runs outside a transaction, statement by statement,
+# so it can use CREATE INDEX CONCURRENTLY. Its statements must end with ";" at the end of a line
+# and it cannot contain function bodies. Write it so it can be re-run after a failure
+# (DROP INDEX CONCURRENTLY IF EXISTS before CREATE INDEX CONCURRENTLY).
+NO_TRANSACTION_MARKER = "-- migrate:no-transaction"
+LOCK_POLL_INTERVAL = 0.5
 
-def run_migrations():
-    conn = psycopg2.connect(Config.DATABASE_URL)
-    cur = conn.cursor()
 
-    files = sorted(f for f in os.listdir(MIGRATIONS_DIR) if f.endswith(".sql"))
+class MigrationError(Exception): pass
+
+
+class Migration:
+    def __init__(self, filename: str):
+        self.filename = filename
+        with open(os.path.join(MIGRATIONS_DIR, filename), "r") as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+        self.transactional = not self.sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+
+    def statements(self) -> list:
+        parts = re.split(r";[ \t]*$", self.sql, flags=re.MULTILINE)
+        statements = []
+        for part in parts:
+            code = "\n".join(line for line in part.splitlines() if not line.strip().startswith("--")).strip()
+            if code:
+                statements.append(code)
+        return statements
+
 
+def _load_migrations() -> list:
+    return [Migration(f) for f in sorted(os.listdir(MIGRATIONS_DIR)) if f.endswith(".sql")]
+
+
+def _ensure_table(cur) -> None:
     cur.execute("""
         CREATE TABLE IF NOT EXISTS migrations (
             id SERIAL PRIMARY KEY,
             filename VARCHAR(255) UNIQUE,
             applied_at TIMESTAMP DEFAULT NOW()
         );
+        ALTER TABLE migrations
+            ADD COLUMN IF NOT EXISTS checksum VARCHAR(64),
+            ADD COLUMN IF NOT EXISTS duration_ms DOUBLE PRECISION;
     """)
-    conn.commit()
-
-    for file in files:
-        cur.execute("SELECT 1 FROM migrations WHERE filename=%s", (file,))
-        if cur.fetchone():
-            continue
-
-        print(f"Applying migration: {file}")
-        with open(os.path.join(MIGRATIONS_DIR, file), "r") as f:
-            sql = f.read()
-            cur.execute(sql)
-        cur.execute("INSERT INTO migrations (filename) VALUES (%s)", (file,))
+
+
+def _applied(cur, migrations: list) -> dict:
+    cur.execute("SELECT filename, checksum FROM migrations")
+    applied = dict(cur.fetchall())
+    # Rows recorded before checksums existed adopt the current file contents.
+    unknown = [m for m in migrations if m.filename in applied and applied[m.filename] is None]
+    for migration in unknown:
+        cur.execute(
+            "UPDATE migrations SET checksum = %s WHERE filename = %s", (migration.checksum, migration.filename)
+        )
+        applied[migration.filename] = migration.checksum
+    changed = [m.filename for m in migrations if m.filename in applied and applied[m.filename] != m.checksum]
+    if changed:
+        raise MigrationError(f"Applied migrations were modified since they ran: {', '.join(changed)}")
+    return applied
+
+
+def _record(cur, migration: Migration, duration: float) -> None:
+    cur.execute(
+        "INSERT INTO migrations (filename, checksum, duration_ms) VALUES (%s, %s, %s)",
+        (migration.filename, migration.checksum, duration * 1000)
+    )
+
+
+def _apply_batch(conn, batch: list) -> None:
+    # One transaction for the whole batch: a failure leaves none of it applied, but every lock a
+    # migration takes is held until the last one in the batch commits.
+    cur = conn.cursor()
+    try:
+        for migration in batch:
+            print(f"Applying migration: {migration.filename}")
+            started = time.perf_counter()
+            cur.execute(migration.sql)
+            duration = time.perf_counter() - started
+            _record(cur, migration, duration)
+            print(f"  {migration.filename} took {duration * 1000:.1f}ms")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def _apply_without_transaction(conn, migration: Migration) -> None:
+    print(f"Applying migration without a transaction: {migration.filename}")
+    conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    cur = conn.cursor()
+    try:
+        started = time.perf_counter()
+        for statement in migration.statements():
+            cur.execute(statement)
+        duration = time.perf_counter() - started
+        _record(cur, migration, duration)
+        print(f"  {migration.filename} took {duration * 1000:.1f}ms")
+    finally:
+        cur.close()
+        conn.set_isolation_level(extensions.ISOLATION_LEVEL_READ_COMMITTED)
+
+
+def run_migrations(single_transaction: bool = False):
+    conn = psycopg2.connect(Config.DATABASE_URL)
+    cur = conn.cursor()
+    started = time.perf_counter()
+
+    # Session-level lock: held across the commits below, released when the connection closes.
+    # Poll outside a transaction instead of blocking in pg_advisory_lock: a waiting statement holds a
+    # snapshot, and CREATE INDEX CONCURRENTLY in the lock holder would wait for it forever.
+    conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    cur.execute("SELECT pg_try_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    while not cur.fetchone()[0]:
+        time.sleep(LOCK_POLL_INTERVAL)
+        cur.execute("SELECT pg_try_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    conn.set_isolation_level(extensions.ISOLATION_LEVEL_READ_COMMITTED)
+    waited = time.perf_counter() - started
+    if waited > 1:
+        print(f"Waited {waited:.1f}s for another migrator to finish")
+    try:
+        _ensure_table(cur)
+        migrations = _load_migrations()
+        applied = _applied(cur, migrations)
         conn.commit()
 
-    cur.close()
-    conn.close()
-    print("All migrations applied!")
+        pending = [m for m in migrations if m.filename not in applied]
+        # Each migration commits on its own unless asked to apply consecutive transactional ones
+        # all-or-nothing.
+        batch = []
+        for migration in pending:
+            if migration.transactional:
+                if batch and not single_transaction:
+                    _apply_batch(conn, batch)
+                    batch = []
+                batch.append(migration)
+                continue
+            if batch:
+                _apply_batch(conn, batch)
+                batch = []
+            _apply_without_transaction(conn, migration)
+        if batch:
+            _apply_batch(conn, batch)
+    finally:
+        cur.close()
+        conn.close()
+    print(f"All migrations applied! ({len(pending)} new, {time.perf_counter() - started:.2f}s)")
 
 if __name__ == "__main__":
-    run_migrations()
+    parser = argparse.ArgumentParser(description="Apply pending migrations")
+    parser.add_argument(
+        "--single-transaction",
+        action="store_true",
+        help="apply consecutive transactional migrations in one transaction (all or nothing)"
+    )
+    args = parser.parse_args()
+    try:
+        run_migrations(args.single_transaction)
+    except MigrationError as e:
+        print(f"Migration failed: {e}")
+        sys.exit(1)
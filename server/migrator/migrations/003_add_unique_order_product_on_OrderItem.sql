@@ -0,0 +1,19 @@
+UPDATE order_items oi
+SET quantity = dup.total_quantity
+FROM (
+    SELECT MIN(id) AS id, SUM(quantity) AS total_quantity
+    FROM order_items
+    WHERE product_id IS NOT NULL
+    GROUP BY order_id, product_id
+    HAVING COUNT(*) > 1
+) dup
+WHERE oi.id = dup.id;
+
+DELETE FROM order_items oi
+USING order_items keep
+WHERE oi.order_id = keep.order_id
+  AND oi.product_id = keep.product_id
+  AND oi.id > keep.id;
+
+ALTER TABLE order_items
+    ADD CONSTRAINT order_items_order_id_product_id_key UNIQUE (order_id, product_id);
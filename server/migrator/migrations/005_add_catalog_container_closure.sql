@@ -0,0 +1,75 @@
+CREATE TABLE catalog_container_closure (
+    ancestor_id INT NOT NULL REFERENCES catalog_containers(id) ON DELETE CASCADE,
+    descendant_id INT NOT NULL REFERENCES catalog_containers(id) ON DELETE CASCADE,
+    depth INT NOT NULL,
+    PRIMARY KEY (ancestor_id, descendant_id)
+);
+
+CREATE INDEX catalog_container_closure_descendant_idx ON catalog_container_closure (descendant_id);
+
+INSERT INTO catalog_container_closure (ancestor_id, descendant_id, depth)
+WITH RECURSIVE tree AS (
+    SELECT id AS ancestor_id, id AS descendant_id, 0 AS depth
+    FROM catalog_containers
+    UNION ALL
+    SELECT tree.ancestor_id, c.id, tree.depth + 1
+    FROM tree
+    JOIN catalog_containers c ON c.parent_id = tree.descendant_id
+)
+SELECT ancestor_id, descendant_id, depth FROM tree;
+
+CREATE OR REPLACE FUNCTION catalog_container_closure_insert() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO catalog_container_closure (ancestor_id, descendant_id, depth)
+    SELECT NEW.id, NEW.id, 0
+    UNION ALL
+    SELECT ancestor_id, NEW.id, depth + 1
+    FROM catalog_container_closure
+    WHERE descendant_id = NEW.parent_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION catalog_container_closure_move() RETURNS trigger AS $$
+BEGIN
+    IF NEW.parent_id IS NOT NULL AND EXISTS (
+        SELECT 1 FROM catalog_container_closure
+        WHERE ancestor_id = NEW.id AND descendant_id = NEW.parent_id
+    ) THEN
+        RAISE EXCEPTION 'Container % cannot be moved under its own descendant %', NEW.id, NEW.parent_id;
+    END IF;
+
+    DELETE FROM catalog_container_closure c
+    USING catalog_container_closure sub, catalog_container_closure sup
+    WHERE c.ancestor_id = sup.ancestor_id
+      AND c.descendant_id = sub.descendant_id
+      AND sub.ancestor_id = NEW.id
+      AND sup.descendant_id = NEW.id
+      AND sup.ancestor_id <> NEW.id;
+
+    INSERT INTO catalog_container_closure (ancestor_id, descendant_id, depth)
+    SELECT sup.ancestor_id, sub.descendant_id, sup.depth + sub.depth + 1
+    FROM catalog_container_closure sup
+    CROSS JOIN catalog_container_closure sub
+    WHERE sup.descendant_id = NEW.parent_id
+      AND sub.ancestor_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER catalog_containers_closure_insert
+    AFTER INSERT ON catalog_containers
+    FOR EACH ROW
+    EXECUTE FUNCTION catalog_container_closure_insert();
+
+CREATE TRIGGER catalog_containers_closure_move
+    AFTER UPDATE OF parent_id ON catalog_containers
+    FOR EACH ROW
+    WHEN (OLD.parent_id IS DISTINCT FROM NEW.parent_id)
+    EXECUTE FUNCTION catalog_container_closure_move();
+
+CREATE INDEX product_catalogs_parent_container_id_idx
+    ON product_catalogs (parent_container_id) WHERE is_active;
+
+CREATE INDEX products_product_catalog_id_id_idx
+    ON products (product_catalog_id, id) WHERE is_active;
@@ -0,0 +1,11 @@
+-- order_items (order_id, product_id) is already covered by the unique constraint from 003,
+-- which also serves list_by_order through its leading column.
+
+CREATE INDEX order_items_product_id_idx ON order_items (product_id);
+
+CREATE INDEX catalog_containers_parent_id_idx ON catalog_containers (parent_id);
+
+-- orders (customer_id) is indexed in 013, by the customer order history index that leads with it.
+
+-- products (product_catalog_id) needs no index of its own: every product query by catalog also filters
+-- on is_active and is served by the partial (product_catalog_id, id) index from 005.
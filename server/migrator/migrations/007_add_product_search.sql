@@ -0,0 +1,17 @@
+-- migrate:no-transaction
+-- Full-text search over product name (weight A) and description (weight B).
+-- The 'simple' configuration does not stem, so it works for any language the catalog uses.
+-- The vector is indexed as an expression rather than stored in a generated column, which would rewrite
+-- products under ACCESS EXCLUSIVE; product_inventory (migration 009) exposes the same expression as
+-- search_vector so the planner matches it against the index. Both indexes build concurrently.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+DROP INDEX CONCURRENTLY IF EXISTS products_search_vector_idx;
+CREATE INDEX CONCURRENTLY products_search_vector_idx ON products USING GIN ((
+    setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+));
+
+-- Trigram index on the name for typo-tolerant matches (name % query).
+DROP INDEX CONCURRENTLY IF EXISTS products_name_trgm_idx;
+CREATE INDEX CONCURRENTLY products_name_trgm_idx ON products USING GIN (name gin_trgm_ops);
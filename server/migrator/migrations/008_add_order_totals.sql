@@ -0,0 +1,85 @@
+-- Orders carry aggregates over their active items so summaries never scan order_items.
+-- Statement-level triggers with transition tables apply one grouped delta per statement,
+-- which keeps add_many and bulk COPY seeding to a single UPDATE of orders.
+
+ALTER TABLE orders
+    ADD COLUMN item_count INT NOT NULL DEFAULT 0,
+    ADD COLUMN total_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+    ADD COLUMN items_updated_at TIMESTAMP;
+
+-- Existing orders start at zero and only collect deltas from here on; jobs/order_totals.py backfill
+-- recomputes them in batches afterwards rather than rewriting every order in this transaction.
+
+CREATE OR REPLACE FUNCTION order_totals_apply(order_ids INT[], item_deltas INT[], amount_deltas NUMERIC[]) RETURNS void AS $$
+BEGIN
+    -- Lock in id order so concurrent multi-order statements cannot deadlock on each other. NO KEY is the
+    -- lock the UPDATE below takes anyway, and the one writers already hold from locking the order first.
+    PERFORM 1 FROM orders WHERE id = ANY(order_ids) ORDER BY id FOR NO KEY UPDATE;
+
+    UPDATE orders o
+    SET item_count = o.item_count + d.item_delta,
+        total_amount = o.total_amount + d.amount_delta,
+        items_updated_at = now() AT TIME ZONE 'utc'
+    FROM unnest(order_ids, item_deltas, amount_deltas) AS d(order_id, item_delta, amount_delta)
+    WHERE o.id = d.order_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION order_items_maintain_totals() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM order_totals_apply(array_agg(order_id), array_agg(item_delta), array_agg(amount_delta))
+        FROM (
+            SELECT order_id,
+                (count(*) FILTER (WHERE is_active))::int AS item_delta,
+                coalesce(sum(unit_price * quantity) FILTER (WHERE is_active), 0) AS amount_delta
+            FROM new_items
+            WHERE order_id IS NOT NULL
+            GROUP BY order_id
+        ) d;
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM order_totals_apply(array_agg(order_id), array_agg(item_delta), array_agg(amount_delta))
+        FROM (
+            SELECT order_id, sum(item_delta)::int AS item_delta, sum(amount_delta) AS amount_delta
+            FROM (
+                SELECT order_id, 1 AS item_delta, unit_price * quantity AS amount_delta
+                FROM new_items WHERE is_active
+                UNION ALL
+                SELECT order_id, -1, -(unit_price * quantity)
+                FROM old_items WHERE is_active
+            ) changes
+            WHERE order_id IS NOT NULL
+            GROUP BY order_id
+        ) d;
+    ELSE
+        PERFORM order_totals_apply(array_agg(order_id), array_agg(item_delta), array_agg(amount_delta))
+        FROM (
+            SELECT order_id,
+                -(count(*) FILTER (WHERE is_active))::int AS item_delta,
+                -coalesce(sum(unit_price * quantity) FILTER (WHERE is_active), 0) AS amount_delta
+            FROM old_items
+            WHERE order_id IS NOT NULL
+            GROUP BY order_id
+        ) d;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER order_items_totals_insert
+    AFTER INSERT ON order_items
+    REFERENCING NEW TABLE AS new_items
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION order_items_maintain_totals();
+
+CREATE TRIGGER order_items_totals_update
+    AFTER UPDATE ON order_items
+    REFERENCING OLD TABLE AS old_items NEW TABLE AS new_items
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION order_items_maintain_totals();
+
+CREATE TRIGGER order_items_totals_delete
+    AFTER DELETE ON order_items
+    REFERENCING OLD TABLE AS old_items
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION order_items_maintain_totals();
@@ -0,0 +1,190 @@
+-- Optional sharded inventory. A product with stock_shards = 1 keeps its counters on the products row.
+-- With stock_shards = N > 1, stock and reservations live in N product_stock_shards rows instead, so
+-- concurrent reservations of a hot product lock different rows; products.stock/reserved then only hold
+-- the totals from the last reshard and product_inventory sums the shards.
+
+ALTER TABLE products ADD COLUMN stock_shards INT NOT NULL DEFAULT 1 CHECK (stock_shards >= 1);
+
+CREATE TABLE product_stock_shards (
+    product_id INT NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    shard INT NOT NULL,
+    stock INT NOT NULL,
+    reserved INT NOT NULL DEFAULT 0 CHECK (reserved >= 0),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (product_id, shard)
+);
+
+CREATE VIEW product_inventory AS
+SELECT p.id, p.name, p.description, p.price,
+    coalesce(s.stock, p.stock) AS stock,
+    coalesce(s.reserved, p.reserved) AS reserved,
+    p.product_catalog_id, p.created_at,
+    greatest(p.updated_at, s.updated_at) AS updated_at,
+    p.is_active, p.stock_shards,
+    -- Must stay identical to the products_search_vector_idx expression (migration 007).
+    setweight(to_tsvector('simple', coalesce(p.name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(p.description, '')), 'B') AS search_vector
+FROM products p
+LEFT JOIN LATERAL (
+    SELECT sum(ps.stock)::int AS stock, sum(ps.reserved)::int AS reserved, max(ps.updated_at) AS updated_at
+    FROM product_stock_shards ps
+    WHERE ps.product_id = p.id AND p.stock_shards > 1
+) s ON p.stock_shards > 1;
+
+-- Reserves quantity and returns the product's resulting totals, or no row when stock is insufficient.
+-- Sharded products try one shard with enough spare stock (random start, skipping locked shards) and
+-- only then lock every shard in order and spread the reservation across them.
+CREATE OR REPLACE FUNCTION reserve_stock(p_product_id INT, p_quantity INT)
+RETURNS TABLE (product_id INT, stock INT, reserved INT, updated_at TIMESTAMP) AS $$
+#variable_conflict use_column
+DECLARE
+    shards INT;
+    start_shard INT;
+    picked INT;
+    remaining INT := p_quantity;
+    taken INT;
+    shard_row RECORD;
+    now_utc TIMESTAMP := now() AT TIME ZONE 'utc';
+BEGIN
+    SELECT p.stock_shards INTO shards FROM products p WHERE p.id = p_product_id;
+    IF shards IS NULL THEN
+        RETURN;
+    END IF;
+
+    IF shards = 1 THEN
+        RETURN QUERY
+        UPDATE products p
+        SET reserved = p.reserved + p_quantity, updated_at = now_utc
+        WHERE p.id = p_product_id AND p.stock_shards = 1 AND p.stock - p.reserved >= p_quantity
+        RETURNING p.id, p.stock, p.reserved, p.updated_at;
+        RETURN;
+    END IF;
+
+    start_shard := floor(random() * shards)::int;
+    SELECT s.shard INTO picked
+    FROM product_stock_shards s
+    WHERE s.product_id = p_product_id AND s.stock - s.reserved >= p_quantity
+    ORDER BY (s.shard - start_shard + shards) % shards
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED;
+
+    IF picked IS NOT NULL THEN
+        UPDATE product_stock_shards s
+        SET reserved = s.reserved + p_quantity, updated_at = now_utc
+        WHERE s.product_id = p_product_id AND s.shard = picked;
+    ELSE
+        PERFORM 1 FROM product_stock_shards s WHERE s.product_id = p_product_id ORDER BY s.shard FOR UPDATE;
+        IF coalesce((
+            SELECT sum(s.stock - s.reserved) FROM product_stock_shards s WHERE s.product_id = p_product_id
+        ), 0) < p_quantity THEN
+            RETURN;
+        END IF;
+
+        FOR shard_row IN
+            SELECT s.shard, s.stock - s.reserved AS free
+            FROM product_stock_shards s
+            WHERE s.product_id = p_product_id AND s.stock > s.reserved
+            ORDER BY s.shard
+        LOOP
+            taken := least(remaining, shard_row.free);
+            UPDATE product_stock_shards s
+            SET reserved = s.reserved + taken, updated_at = now_utc
+            WHERE s.product_id = p_product_id AND s.shard = shard_row.shard;
+            remaining := remaining - taken;
+            EXIT WHEN remaining = 0;
+        END LOOP;
+    END IF;
+
+    RETURN QUERY
+    SELECT p_product_id, sum(s.stock)::int, sum(s.reserved)::int, max(s.updated_at)
+    FROM product_stock_shards s
+    WHERE s.product_id = p_product_id;
+END;
+$$ LANGUAGE plpgsql ROWS 1;
+
+-- Returns up to quantity reserved units to stock and reports how many were released.
+CREATE OR REPLACE FUNCTION release_stock(p_product_id INT, p_quantity INT) RETURNS INT AS $$
+DECLARE
+    shards INT;
+    remaining INT := p_quantity;
+    taken INT;
+    shard_row RECORD;
+    now_utc TIMESTAMP := now() AT TIME ZONE 'utc';
+BEGIN
+    SELECT p.stock_shards INTO shards FROM products p WHERE p.id = p_product_id;
+    IF shards IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    IF shards = 1 THEN
+        SELECT least(p.reserved, p_quantity) INTO taken
+        FROM products p WHERE p.id = p_product_id AND p.stock_shards = 1
+        FOR UPDATE;
+        UPDATE products p
+        SET reserved = p.reserved - taken, updated_at = now_utc
+        WHERE p.id = p_product_id AND p.stock_shards = 1;
+        RETURN coalesce(taken, 0);
+    END IF;
+
+    FOR shard_row IN
+        SELECT s.shard, s.reserved
+        FROM product_stock_shards s
+        WHERE s.product_id = p_product_id AND s.reserved > 0
+        ORDER BY s.shard
+        FOR UPDATE
+    LOOP
+        taken := least(remaining, shard_row.reserved);
+        UPDATE product_stock_shards s
+        SET reserved = s.reserved - taken, updated_at = now_utc
+        WHERE s.product_id = p_product_id AND s.shard = shard_row.shard;
+        remaining := remaining - taken;
+        EXIT WHEN remaining = 0;
+    END LOOP;
+    RETURN p_quantity - remaining;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Moves a product to p_shards counters, spreading the current totals (or the given ones) evenly.
+CREATE OR REPLACE FUNCTION reshard_product_stock(
+    p_product_id INT, p_shards INT, p_stock INT DEFAULT NULL, p_reserved INT DEFAULT NULL
+) RETURNS void AS $$
+DECLARE
+    current_shards INT;
+    total_stock INT;
+    total_reserved INT;
+BEGIN
+    IF p_shards < 1 THEN
+        RAISE EXCEPTION 'Shard count must be at least 1, got %', p_shards;
+    END IF;
+
+    SELECT p.stock_shards, p.stock, p.reserved INTO current_shards, total_stock, total_reserved
+    FROM products p WHERE p.id = p_product_id
+    FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Product % not found', p_product_id;
+    END IF;
+
+    IF current_shards > 1 THEN
+        PERFORM 1 FROM product_stock_shards s WHERE s.product_id = p_product_id ORDER BY s.shard FOR UPDATE;
+        SELECT coalesce(sum(s.stock), 0), coalesce(sum(s.reserved), 0) INTO total_stock, total_reserved
+        FROM product_stock_shards s WHERE s.product_id = p_product_id;
+        DELETE FROM product_stock_shards s WHERE s.product_id = p_product_id;
+    END IF;
+
+    total_stock := coalesce(p_stock, total_stock);
+    total_reserved := coalesce(p_reserved, total_reserved);
+
+    IF p_shards > 1 THEN
+        INSERT INTO product_stock_shards (product_id, shard, stock, reserved, updated_at)
+        SELECT p_product_id, n,
+            total_stock / p_shards + (n < total_stock % p_shards)::int,
+            total_reserved / p_shards + (n < total_reserved % p_shards)::int,
+            now() AT TIME ZONE 'utc'
+        FROM generate_series(0, p_shards - 1) AS n;
+    END IF;
+
+    UPDATE products p
+    SET stock_shards = p_shards, stock = total_stock, reserved = total_reserved, updated_at = now() AT TIME ZONE 'utc'
+    WHERE p.id = p_product_id;
+END;
+$$ LANGUAGE plpgsql;
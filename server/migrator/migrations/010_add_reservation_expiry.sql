@@ -0,0 +1,76 @@
+-- Order lines hold their stock reservation until reserved_until. jobs/release_reservations.py hands
+-- expired reservations back to products (or their stock shards) in set-based batches.
+-- reserved_quantity is the part of the line that is still reserved: a release zeroes it, and adding
+-- the product to the order again reserves only the new quantity.
+
+ALTER TABLE order_items
+    ADD COLUMN reserved_quantity INT NOT NULL DEFAULT 0 CHECK (reserved_quantity >= 0),
+    ADD COLUMN reserved_until TIMESTAMP,
+    ADD COLUMN reservation_released_at TIMESTAMP;
+
+-- Existing lines start with nothing recorded as reserved; jobs/release_reservations.py --backfill records
+-- what they hold in batches afterwards rather than rewriting every order line in this transaction.
+
+CREATE INDEX order_items_reserved_until_idx ON order_items (reserved_until)
+    WHERE reserved_quantity > 0 AND reserved_until IS NOT NULL;
+
+-- Canceling an order makes its reservations due now; moving it past 'new' keeps them for good.
+CREATE OR REPLACE FUNCTION orders_reservation_status() RETURNS trigger AS $$
+BEGIN
+    UPDATE order_items
+    SET reserved_until = CASE WHEN NEW.status = 'canceled' THEN now() AT TIME ZONE 'utc' END
+    WHERE order_id = NEW.id AND reserved_quantity > 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER orders_reservation_status
+    AFTER UPDATE OF status ON orders
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status AND NEW.status IN ('processing', 'completed', 'canceled'))
+    EXECUTE FUNCTION orders_reservation_status();
+
+-- Releasing a reservation changes no totals, so skip the orders update (and its row lock) for
+-- statements whose grouped delta is zero.
+CREATE OR REPLACE FUNCTION order_items_maintain_totals() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM order_totals_apply(array_agg(order_id), array_agg(item_delta), array_agg(amount_delta))
+        FROM (
+            SELECT order_id,
+                (count(*) FILTER (WHERE is_active))::int AS item_delta,
+                coalesce(sum(unit_price * quantity) FILTER (WHERE is_active), 0) AS amount_delta
+            FROM new_items
+            WHERE order_id IS NOT NULL
+            GROUP BY order_id
+        ) d;
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM order_totals_apply(array_agg(order_id), array_agg(item_delta), array_agg(amount_delta))
+        FROM (
+            SELECT order_id, sum(item_delta)::int AS item_delta, sum(amount_delta) AS amount_delta
+            FROM (
+                SELECT order_id, 1 AS item_delta, unit_price * quantity AS amount_delta
+                FROM new_items WHERE is_active
+                UNION ALL
+                SELECT order_id, -1, -(unit_price * quantity)
+                FROM old_items WHERE is_active
+            ) changes
+            WHERE order_id IS NOT NULL
+            GROUP BY order_id
+            HAVING sum(item_delta) <> 0 OR sum(amount_delta) <> 0
+        ) d
+        HAVING count(*) > 0;
+    ELSE
+        PERFORM order_totals_apply(array_agg(order_id), array_agg(item_delta), array_agg(amount_delta))
+        FROM (
+            SELECT order_id,
+                -(count(*) FILTER (WHERE is_active))::int AS item_delta,
+                -coalesce(sum(unit_price * quantity) FILTER (WHERE is_active), 0) AS amount_delta
+            FROM old_items
+            WHERE order_id IS NOT NULL
+            GROUP BY order_id
+        ) d;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
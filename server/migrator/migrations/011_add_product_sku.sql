@@ -0,0 +1,4 @@
+-- Supplier feeds identify products by SKU; jobs/import_products.py and POST /products/import merge on it.
+
+ALTER TABLE products ADD COLUMN sku VARCHAR(64);
+ALTER TABLE products ADD CONSTRAINT products_sku_key UNIQUE (sku);
@@ -0,0 +1,5 @@
+-- migrate:no-transaction
+-- Date-range order exports (GET /exports/orders, jobs/export_orders.py) filter on order_date.
+-- Built concurrently so orders stay writable while the index builds.
+DROP INDEX CONCURRENTLY IF EXISTS orders_order_date_idx;
+CREATE INDEX CONCURRENTLY orders_order_date_idx ON orders (order_date);
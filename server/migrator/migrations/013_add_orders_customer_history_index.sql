@@ -0,0 +1,17 @@
+-- migrate:no-transaction
+-- Customer order history (GET /customers/<id>/orders): newest first, keyset-paged on (order_date, id).
+-- The key covers the filter, the order and the cursor, so a page reads exactly LIMIT entries with no sort.
+-- Leading with customer_id, it also serves the customer foreign key lookups.
+-- Order columns are deliberately not INCLUDEd for index-only scans: every order line updates
+-- item_count and total_amount, and indexing them would turn those HOT updates into index updates.
+-- The cursor cannot express a NULL order_date and a row comparison would silently skip one, so the
+-- column becomes NOT NULL (it always had a default; only an explicit NULL left it empty). The CHECK is
+-- validated without blocking writes, and SET NOT NULL then relies on it instead of scanning the table.
+UPDATE orders SET order_date = coalesce(created_at, CURRENT_TIMESTAMP) WHERE order_date IS NULL;
+ALTER TABLE orders DROP CONSTRAINT IF EXISTS orders_order_date_not_null;
+ALTER TABLE orders ADD CONSTRAINT orders_order_date_not_null CHECK (order_date IS NOT NULL) NOT VALID;
+ALTER TABLE orders VALIDATE CONSTRAINT orders_order_date_not_null;
+ALTER TABLE orders ALTER COLUMN order_date SET NOT NULL;
+ALTER TABLE orders DROP CONSTRAINT orders_order_date_not_null;
+DROP INDEX CONCURRENTLY IF EXISTS orders_customer_order_date_idx;
+CREATE INDEX CONCURRENTLY orders_customer_order_date_idx ON orders (customer_id, order_date DESC, id DESC);
@@ -1,56 +1,198 @@
-from datetime import datetime
-from domain.models import OrderItem
-from domain.repositories import ProductRepository, OrderRepository, OrderItemRepository
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from domain.models import Order, OrderItem, Product
+from domain.unit_of_work import UnitOfWork, AsyncUnitOfWork
+
+DEFAULT_RESERVATION_TTL = timedelta(minutes=30)
+
 
 class OrderNotFoundError(Exception): pass
+class CustomerNotFoundError(Exception): pass
 class ProductNotFoundError(Exception): pass
 class InsufficientStockError(Exception): pass
 
 
+class OrderLinesError(Exception):
+    def __init__(self, errors: List[dict]):
+        super().__init__(f"{len(errors)} order line(s) rejected")
+        self.errors = errors
+
+
+def merge_lines(lines: List[Tuple[int, int]]) -> Dict[int, int]:
+    quantities = {}
+    for product_id, quantity in lines:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def check_lines(lines: List[Tuple[int, int]], quantities: Dict[int, int], products: Dict[int, Product]) -> List[dict]:
+    errors = []
+    for index, (product_id, quantity) in enumerate(lines):
+        product = products.get(product_id)
+        if not product:
+            errors.append({"index": index, "product_id": product_id, "detail": f"Product {product_id} not found"})
+        elif product.available < quantities[product_id]:
+            errors.append({
+                "index": index,
+                "product_id": product_id,
+                "detail": f"Not enough stock for product {product_id}: "
+                          f"available {product.available}, requested {quantities[product_id]}"
+            })
+    return errors
+
+
+def reservation_deadline(order: Order, created_at: datetime, reservation_ttl: timedelta) -> Optional[datetime]:
+    # Same rules as the orders_reservation_status trigger (migration 010): only lines of a new order
+    # expire, a canceled order's are due at once, and processing/completed orders keep theirs for good.
+    if order.status == "new":
+        return created_at + reservation_ttl
+    if order.status == "canceled":
+        return created_at
+    return None
+
+
+def new_order_item(
+    order: Order, product: Product, quantity: int, created_at: datetime, reservation_ttl: timedelta
+) -> OrderItem:
+    return OrderItem(
+        id=None,
+        order_id=order.id,
+        product_id=product.id,
+        product_name=product.name,
+        unit_price=product.price,
+        quantity=quantity,
+        created_at=created_at,
+        is_active=True,
+        reserved_quantity=quantity,
+        reserved_until=reservation_deadline(order, created_at, reservation_ttl)
+    )
+
+
+def insufficient_stock(product_id: int, product: Product, quantity: int) -> Exception:
+    if not product:
+        return ProductNotFoundError(f"Product {product_id} not found")
+    return InsufficientStockError(
+        f"Not enough stock for product {product_id}: available {product.available}, requested {quantity}"
+    )
+
+
 class OrderService:
-    def __init__(
+    def __init__(self, uow: UnitOfWork, reservation_ttl: timedelta = DEFAULT_RESERVATION_TTL):
+        self.uow = uow
+        self.reservation_ttl = reservation_ttl
+
+    def get_order(self, order_id: int) -> Order:
+        with self.uow as uow:
+            order = uow.orders.get_by_id(order_id)
+            if not order:
+                raise OrderNotFoundError(f"Order {order_id} not found")
+            return order
+
+    def list_customer_orders(
         self,
-        product_repo: ProductRepository,
-        order_repo: OrderRepository,
-        order_item_repo: OrderItemRepository
-    ):
-        self.product_repo = product_repo
-        self.order_repo = order_repo
-        self.order_item_repo = order_item_repo
+        customer_id: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 50,
+        statuses: Optional[List[str]] = None
+    ) -> List[Order]:
+        with self.uow as uow:
+            orders = uow.orders.list_by_customer(customer_id, after, limit, statuses)
+            if not orders and not uow.customers.get_by_id(customer_id):
+                raise CustomerNotFoundError(f"Customer {customer_id} not found")
+            return orders
 
     def add_product_to_order(self, order_id: int, product_id: int, quantity: int) -> OrderItem:
-        order = self.order_repo.get_by_id(order_id)
-        if not order:
-            raise OrderNotFoundError(f"Order {order_id} not found")
+        with self.uow as uow:
+            # Locked first, like every writer of orders and their lines: a concurrent status change
+            # waits for this line instead of deadlocking with it, and the deadline sees the final status.
+            order = uow.orders.get_by_id(order_id, for_update=True)
+            if not order:
+                raise OrderNotFoundError(f"Order {order_id} not found")
 
-        product = self.product_repo.get_by_id(product_id)
-        if not product:
-            raise ProductNotFoundError(f"Product {product_id} not found")
+            product = uow.products.reserve(product_id, quantity)
+            if not product:
+                raise insufficient_stock(product_id, uow.products.get_by_id(product_id), quantity)
 
-        if product.available < quantity:
-            raise InsufficientStockError(
-                f"Not enough stock for product {product_id}: available {product.available}, requested {quantity}"
+            order_item = uow.order_items.upsert(
+                new_order_item(order, product, quantity, datetime.utcnow(), self.reservation_ttl)
             )
+            uow.commit()
+            return order_item
+
+    def add_products_to_order(self, order_id: int, lines: List[Tuple[int, int]]) -> List[OrderItem]:
+        quantities = merge_lines(lines)
+
+        with self.uow as uow:
+            order = uow.orders.get_by_id(order_id, for_update=True)
+            if not order:
+                raise OrderNotFoundError(f"Order {order_id} not found")
+
+            products = {
+                product.id: product
+                for product in uow.products.get_many(sorted(quantities), for_update=True)
+            }
+            errors = check_lines(lines, quantities, products)
+            if errors:
+                raise OrderLinesError(errors)
+
+            reserved = uow.products.reserve_many(quantities)
+            if len(reserved) != len(quantities):
+                raise InsufficientStockError(f"Stock changed while reserving products for order {order_id}")
+
+            created_at = datetime.utcnow()
+            order_items = uow.order_items.add_many([
+                new_order_item(order, product, quantities[product.id], created_at, self.reservation_ttl)
+                for product in reserved
+            ])
+            uow.commit()
+            return order_items
 
-        order_item = self.order_item_repo.get_by_order_and_product(order_id, product_id)
-
-        if order_item:
-            order_item.quantity += quantity
-            self.order_item_repo.update(order_item)
-        else:
-            order_item = OrderItem(
-                id=None,
-                order_id=order_id,
-                product_id=product_id,
-                product_name=product.name,
-                unit_price=product.price,
-                quantity=quantity,
-                created_at=datetime.utcnow(),
-                is_active=True
+
+class AsyncOrderService:
+    def __init__(self, uow: AsyncUnitOfWork, reservation_ttl: timedelta = DEFAULT_RESERVATION_TTL):
+        self.uow = uow
+        self.reservation_ttl = reservation_ttl
+
+    async def add_product_to_order(self, order_id: int, product_id: int, quantity: int) -> OrderItem:
+        async with self.uow as uow:
+            order = await uow.orders.get_by_id(order_id, for_update=True)
+            if not order:
+                raise OrderNotFoundError(f"Order {order_id} not found")
+
+            product = await uow.products.reserve(product_id, quantity)
+            if not product:
+                raise insufficient_stock(product_id, await uow.products.get_by_id(product_id), quantity)
+
+            order_item = await uow.order_items.upsert(
+                new_order_item(order, product, quantity, datetime.utcnow(), self.reservation_ttl)
             )
-            order_item = self.order_item_repo.add(order_item)
+            await uow.commit()
+            return order_item
+
+    async def add_products_to_order(self, order_id: int, lines: List[Tuple[int, int]]) -> List[OrderItem]:
+        quantities = merge_lines(lines)
+
+        async with self.uow as uow:
+            order = await uow.orders.get_by_id(order_id, for_update=True)
+            if not order:
+                raise OrderNotFoundError(f"Order {order_id} not found")
+
+            products = {
+                product.id: product
+                for product in await uow.products.get_many(sorted(quantities), for_update=True)
+            }
+            errors = check_lines(lines, quantities, products)
+            if errors:
+                raise OrderLinesError(errors)
 
-        product.reserved += quantity
-        self.product_repo.update(product)
+            reserved = await uow.products.reserve_many(quantities)
+            if len(reserved) != len(quantities):
+                raise InsufficientStockError(f"Stock changed while reserving products for order {order_id}")
 
-        return order_item
+            created_at = datetime.utcnow()
+            order_items = await uow.order_items.add_many([
+                new_order_item(order, product, quantities[product.id], created_at, self.reservation_ttl)
+                for product in reserved
+            ])
+            await uow.commit()
+            return order_items
@@ -0,0 +1,31 @@
+from typing import List, Optional, Tuple
+from domain.models import Product, ProductSearchResult
+from domain.unit_of_work import UnitOfWork
+
+class ContainerNotFoundError(Exception): pass
+
+
+class CatalogService:
+    def __init__(self, uow: UnitOfWork):
+        self.uow = uow
+
+    def list_container_products(self, container_id: int, after_id: Optional[int] = None, limit: int = 50) -> List[Product]:
+        with self.uow as uow:
+            products = uow.catalogs.list_subtree_products(container_id, after_id, limit)
+            if not products and not uow.catalogs.get_container_by_id(container_id):
+                raise ContainerNotFoundError(f"Container {container_id} not found")
+            return products
+
+    def get_availability(self, product_ids: List[int]) -> List[Product]:
+        with self.uow as uow:
+            return uow.products.get_many(product_ids)
+
+    def list_products(self, after_id: Optional[int] = None, limit: int = 50) -> List[Product]:
+        with self.uow as uow:
+            return uow.products.list_page(after_id, limit)
+
+    def search_products(
+        self, query: str, catalog_id: Optional[int] = None, after: Optional[Tuple[float, int]] = None, limit: int = 20
+    ) -> List[ProductSearchResult]:
+        with self.uow as uow:
+            return uow.products.search(query, catalog_id, limit, after)
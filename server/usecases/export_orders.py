@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+from domain.models import Order, OrderItem
+from domain.unit_of_work import UnitOfWork
+
+
+class OrderExportService:
+    def __init__(self, uow: UnitOfWork):
+        self.uow = uow
+
+    def iter_orders(
+        self,
+        statuses: Optional[List[str]] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> Iterator[Tuple[Order, List[OrderItem]]]:
+        # The connection stays checked out until the consumer finishes or closes the iterator.
+        with self.uow as uow:
+            yield from uow.orders.iter_with_items(statuses, date_from, date_to)